@@ -0,0 +1,182 @@
+# archive.py
+import os
+import json
+import time
+import hashlib
+import logging
+import tempfile
+import requests
+
+from config import ARCHIVE_ENABLED, ARCHIVE_DIR, ARCHIVE_MAX_MB, ARCHIVE_COMPRESSION_LEVEL
+
+# zstandard is only needed when the archive is enabled.
+try:
+    import zstandard as zstd
+except ImportError:
+    zstd = None
+
+# Blobs live at <ARCHIVE_DIR>/<first 2 hex chars>/<sha256>.html.zst; the index maps URLs to hashes.
+INDEX_FILE = os.path.join(ARCHIVE_DIR, 'index.jsonl')
+CHUNK_SIZE = 64 * 1024
+
+_index = None  # url -> latest index entry, loaded on first use
+_warned_missing_zstd = False
+
+def _archive_ready():
+    global _warned_missing_zstd
+    if not ARCHIVE_ENABLED:
+        return False
+    if zstd is None:
+        if not _warned_missing_zstd:
+            logging.warning("HTML archive is enabled but 'zstandard' is not installed. Pages will not be archived.")
+            _warned_missing_zstd = True
+        return False
+    try:
+        os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    except OSError as e:
+        logging.warning(f"HTML archive directory is unavailable: {e}")
+        return False
+    return True
+
+def _blob_path(content_hash):
+    return os.path.join(ARCHIVE_DIR, content_hash[:2], f"{content_hash}.html.zst")
+
+def _load_index():
+    global _index
+    if _index is None:
+        _index = {}
+        if os.path.exists(INDEX_FILE):
+            with open(INDEX_FILE, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # A torn final line from an interrupted write.
+                    _index[entry['url']] = entry
+    return _index
+
+def _commit_blob(url, tmp_path, content_hash, size, encoding):
+    """Moves a finished temp blob into place (or reuses an identical one) and appends to the index."""
+    path = _blob_path(content_hash)
+    if os.path.exists(path):
+        os.utime(path)  # Identical page already archived; refresh it for retention.
+    else:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp_path, path)
+    entry = {'url': url, 'sha256': content_hash, 'encoding': encoding, 'size': size, 'fetched_at': int(time.time())}
+    with open(INDEX_FILE, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry) + '\n')
+    _load_index()[url] = entry
+
+def _remove_quietly(path):
+    """Deletes a file if it exists. Archive housekeeping must never interrupt scraping."""
+    try:
+        if path and os.path.exists(path):
+            os.remove(path)
+    except OSError as e:
+        logging.warning(f"Could not remove archive file {path}: {e}")
+
+def stream_to_archive(url, response, encoding=None):
+    """Reads a streamed HTTP response, compressing it into the archive as it arrives.
+    Returns the raw body bytes, whether or not archiving succeeded."""
+    if not _archive_ready():
+        return response.content
+
+    hasher = hashlib.sha256()
+    chunks = []
+    tmp_path = None
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=ARCHIVE_DIR, suffix='.tmp')
+        with open(fd, 'wb') as raw_file:
+            with zstd.ZstdCompressor(level=ARCHIVE_COMPRESSION_LEVEL).stream_writer(raw_file, closefd=False) as writer:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    chunks.append(chunk)
+                    hasher.update(chunk)
+                    writer.write(chunk)
+        html_bytes = b''.join(chunks)
+        _commit_blob(url, tmp_path, hasher.hexdigest(), len(html_bytes), encoding)
+        return html_bytes
+    except requests.exceptions.RequestException:
+        # A broken download, not an archive problem (RequestException subclasses OSError). The caller handles it.
+        raise
+    except OSError as e:
+        logging.warning(f"Could not archive HTML for {url}: {e}")
+        # Finish reading whatever the archive write interrupted.
+        return b''.join(chunks) + b''.join(response.iter_content(chunk_size=CHUNK_SIZE))
+    finally:
+        _remove_quietly(tmp_path)
+
+def archive_html(url, html_bytes, encoding=None):
+    """Archives a page that is already in memory (e.g. a Selenium page source)."""
+    if not _archive_ready():
+        return
+    tmp_path = None
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=ARCHIVE_DIR, suffix='.tmp')
+        with open(fd, 'wb') as raw_file:
+            with zstd.ZstdCompressor(level=ARCHIVE_COMPRESSION_LEVEL).stream_writer(raw_file, closefd=False) as writer:
+                for i in range(0, len(html_bytes), CHUNK_SIZE):
+                    writer.write(html_bytes[i:i + CHUNK_SIZE])
+        _commit_blob(url, tmp_path, hashlib.sha256(html_bytes).hexdigest(), len(html_bytes), encoding)
+    except OSError as e:
+        logging.warning(f"Could not archive HTML for {url}: {e}")
+    finally:
+        _remove_quietly(tmp_path)
+
+def load_archived_html(url):
+    """Returns (html_bytes, encoding) for the most recent archived copy of a URL, or (None, None)."""
+    if zstd is None:
+        return None, None
+    entry = _load_index().get(url)
+    if not entry:
+        return None, None
+    try:
+        with open(_blob_path(entry['sha256']), 'rb') as f:
+            return zstd.ZstdDecompressor().stream_reader(f).read(), entry.get('encoding')
+    except (OSError, zstd.ZstdError) as e:
+        logging.warning(f"Archived HTML for {url} is unreadable: {e}")
+        return None, None
+
+def enforce_retention():
+    """Deletes the least recently archived blobs until the archive fits in ARCHIVE_MAX_MB,
+    then rewrites the index without the entries that were dropped."""
+    if not ARCHIVE_ENABLED or not os.path.isdir(ARCHIVE_DIR):
+        return
+    blobs = []
+    for shard in os.scandir(ARCHIVE_DIR):
+        if shard.is_dir():
+            for blob in os.scandir(shard.path):
+                stat = blob.stat()
+                blobs.append((stat.st_mtime, stat.st_size, blob.path))
+    total = sum(size for _, size, _ in blobs)
+    limit = ARCHIVE_MAX_MB * 1024 * 1024
+    if total <= limit:
+        return
+
+    removed = 0
+    for _, size, path in sorted(blobs):
+        if total <= limit:
+            break
+        try:
+            os.remove(path)
+        except OSError as e:
+            logging.warning(f"Could not remove archive file {path}: {e}")
+            continue
+        total -= size
+        removed += 1
+
+    index = _load_index()
+    kept = {url: entry for url, entry in index.items() if os.path.exists(_blob_path(entry['sha256']))}
+    tmp_path = INDEX_FILE + '.tmp'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for entry in kept.values():
+                f.write(json.dumps(entry) + '\n')
+        os.replace(tmp_path, INDEX_FILE)
+    except OSError as e:
+        # Entries for deleted blobs just become misses until the next successful rewrite.
+        logging.warning(f"Could not rewrite the HTML archive index: {e}")
+        _remove_quietly(tmp_path)
+    index.clear()
+    index.update(kept)
+    logging.info(f"🗄️ HTML archive retention removed {removed} pages ({total / 1024 / 1024:.0f} MB kept).")
@@ -36,14 +36,70 @@ TARGET_COUNTRY = os.getenv("TARGET_COUNTRY", "us")
 TARGET_CATEGORY = os.getenv("TARGET_CATEGORY", "all")
 TIMEZONE = 'Asia/Baghdad'
 FETCH_COOLDOWN_HOURS = 1
+# Full texts of posted articles are purged after this many days (see db_reset_utility.py purge-bodies).
+BODY_RETENTION_DAYS = int(os.getenv("BODY_RETENTION_DAYS", "30"))
 TRANSLATION_CHUNK_SIZE = 80
 GEMINI_TAG_COUNT = 4
 CYCLE_COOLDOWN_MINUTES = int(os.getenv("CYCLE_COOLDOWN_MINUTES", "25"))
+# Startup logs a warning when imports (main.py's plus the lazy client and logging imports) take longer
+# than this (container restarts on every deploy). Time until ready for the first cycle is logged too.
+STARTUP_IMPORT_BUDGET_MS = int(os.getenv("STARTUP_IMPORT_BUDGET_MS", "500"))
+
+# --- HTML Parsing Worker Pool ---
+# CPU-heavy parsing (newspaper3k, HTML cleanup) runs in separate processes so it isn't capped by the GIL.
+# Workers are recycled after PARSE_WORKER_MAX_TASKS tasks to bound lxml memory growth.
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+PARSE_WORKER_MAX_TASKS = int(os.getenv("PARSE_WORKER_MAX_TASKS", "50"))
+PARSE_TIMEOUT_SECONDS = 60
+
+# --- Scraping Politeness ---
+# Per-domain pacing for article downloads. robots.txt Crawl-delay wins when it is stricter.
+DOMAIN_MIN_DELAY_SECONDS = float(os.getenv("DOMAIN_MIN_DELAY_SECONDS", "5"))
+DOMAIN_BURST = 2
+DOMAIN_MAX_WAIT_SECONDS = 30
+ROBOTS_CACHE_HOURS = 24
+# Backoff after a 403/429 doubles on each repeat, capped at DOMAIN_BACKOFF_MAX_SECONDS.
+DOMAIN_BACKOFF_BASE_SECONDS = 120
+DOMAIN_BACKOFF_MAX_SECONDS = 6 * 3600
+# Domains failing this many times in a row are skipped for DOMAIN_SKIP_HOURS.
+DOMAIN_FAILURE_THRESHOLD = 3
+DOMAIN_SKIP_HOURS = 6
+
+# --- Raw HTML Archive ---
+# Every downloaded article page is kept zstd-compressed and content-addressed so pages can be
+# re-extracted offline. The oldest pages are pruned once the archive exceeds ARCHIVE_MAX_MB.
+ARCHIVE_ENABLED = os.getenv("ARCHIVE_ENABLED", "true").lower() == "true"
+ARCHIVE_DIR = os.path.join(DATA_DIR, 'html_archive')
+ARCHIVE_MAX_MB = int(os.getenv("ARCHIVE_MAX_MB", "2048"))
+ARCHIVE_COMPRESSION_LEVEL = 10
 
 # --- Posting Platform Toggles ---
 POST_TO_TUMBLR = os.getenv("POST_TO_TUMBLR", "true").lower() == "true"
 POST_TO_TELEGRAM = os.getenv("POST_TO_TELEGRAM", "true").lower() == "true"
 
+# --- Posting Schedule ---
+def parse_weights(weights_string):
+    """Parses 'name:weight,name:weight' into a dict of floats."""
+    items = [item.rsplit(':', 1) for item in weights_string.split(',') if ':' in item]
+    return {name.strip(): float(weight) for name, weight in items if name.strip()}
+
+# Translated articles are posted highest score first. Score = category weight * source weight
+# * freshness (halves every FRESHNESS_HALF_LIFE_HOURS), reduced for titles similar to recent posts.
+CATEGORY_WEIGHTS = parse_weights(os.getenv("CATEGORY_WEIGHTS", "kurdistan:1.5"))
+SOURCE_PRIORITY = parse_weights(os.getenv("SOURCE_PRIORITY", ""))
+FRESHNESS_HALF_LIFE_HOURS = float(os.getenv("FRESHNESS_HALF_LIFE_HOURS", "6"))
+DUPLICATE_PENALTY = 0.8
+DUPLICATE_LOOKBACK_HOURS = 24
+# Articles older than this are expired instead of being translated or posted.
+ARTICLE_MAX_AGE_HOURS = float(os.getenv("ARTICLE_MAX_AGE_HOURS", "48"))
+# Target posting rates, paced per platform; the old fixed 180-300s pause was roughly 15 posts per hour.
+# Every article still goes to each enabled platform: at equal rates they post together, and with
+# different rates the slower platform catches up on articles the faster one has already posted.
+TUMBLR_POSTS_PER_HOUR = float(os.getenv("TUMBLR_POSTS_PER_HOUR", "15"))
+TELEGRAM_POSTS_PER_HOUR = float(os.getenv("TELEGRAM_POSTS_PER_HOUR", "15"))
+# The posting stage hands back to fetching after this long, so new articles get scored too.
+POSTING_WINDOW_MINUTES = int(os.getenv("POSTING_WINDOW_MINUTES", "60"))
+
 # --- User-Agent Information ---
 CONTACT_EMAIL = os.getenv("CONTACT_EMAIL")
 BLOG_URL = os.getenv("BLOG_URL")
@@ -1,7 +1,8 @@
 import psycopg2
 import sys
+import argparse
 # Import your database URL from your existing config.py
-from config import DATABASE_URL 
+from config import DATABASE_URL, BODY_RETENTION_DAYS
 
 # --- Configuration Constants ---
 STATUS_POSTED = 'posted'
@@ -59,7 +60,73 @@ def reset_database(conn):
         sys.exit(1)
 
 
+def purge_posted_bodies(conn, retention_days, full_vacuum=False):
+    """
+    Non-interactive maintenance:
+    1. Deletes the stored full texts of articles posted more than `retention_days` ago.
+       The narrow `articles` rows are kept, so posted URLs are still de-duplicated.
+    2. Vacuums the body tables so the freed space can be reused (or returned to the OS with full_vacuum).
+    """
+    print(f"\n--- 🧹 PURGING BODIES OF ARTICLES POSTED MORE THAN {retention_days} DAYS AGO ---")
+
+    # Rows posted before posted_at existed fall back to their publish date.
+    posted_before_cutoff = """status = %s AND COALESCE(
+                                  posted_at,
+                                  CASE WHEN publishedAt ~ '^[0-9]{4}-[0-9]{2}-[0-9]{2}T' THEN publishedAt::timestamptz END
+                              ) < NOW() - make_interval(days => %s)"""
+    try:
+        with conn.cursor() as cursor:
+            print("1. Deleting compressed bodies...")
+            cursor.execute(f"DELETE FROM article_bodies b USING articles a WHERE a.url = b.url AND {posted_before_cutoff}",
+                           (STATUS_POSTED, retention_days))
+            purged_count = cursor.rowcount
+            print(f"   -> Purged {purged_count} article bodies.")
+
+            # A database the bot hasn't migrated yet may still hold texts inline.
+            print("2. Clearing inline texts left in 'articles'...")
+            cursor.execute("SELECT 1 FROM information_schema.columns WHERE table_name = 'articles' AND column_name = 'summary'")
+            if cursor.fetchone():
+                cursor.execute(f"UPDATE articles SET summary = NULL, summary_ku = NULL WHERE (summary IS NOT NULL OR summary_ku IS NOT NULL) AND {posted_before_cutoff}",
+                               (STATUS_POSTED, retention_days))
+                print(f"   -> Cleared {cursor.rowcount} inline texts.")
+            else:
+                print("   -> None left; 'articles' is already migrated.")
+            conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ CRITICAL ERROR: Body purge failed. Changes rolled back. Error: {e}")
+        sys.exit(1)
+
+    # VACUUM cannot run inside a transaction block.
+    print("3. Compacting tables...")
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cursor:
+            vacuum = "VACUUM (FULL, ANALYZE)" if full_vacuum else "VACUUM (ANALYZE)"
+            cursor.execute(f"{vacuum} article_bodies")
+            cursor.execute(f"{vacuum} articles")
+    finally:
+        conn.autocommit = False
+    print("   -> Done.")
+    print(f"\n--- ✅ BODY PURGE COMPLETE ({purged_count} bodies removed) ---")
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Database maintenance for the news bot. Runs the interactive reset when no command is given.")
+    subparsers = parser.add_subparsers(dest='command')
+    purge_parser = subparsers.add_parser('purge-bodies', help="Delete full texts of posted articles older than the retention window (non-interactive).")
+    purge_parser.add_argument('--days', type=int, default=BODY_RETENTION_DAYS, help=f"Retention window in days (default: {BODY_RETENTION_DAYS}).")
+    purge_parser.add_argument('--full-vacuum', action='store_true', help="Use VACUUM FULL to return space to the OS. Locks the tables while it runs.")
+    args = parser.parse_args()
+
+    if args.command == 'purge-bodies':
+        conn = get_db_connection()
+        try:
+            purge_posted_bodies(conn, args.days, args.full_vacuum)
+        finally:
+            conn.close()
+        return
+
     try:
         with get_db_connection() as conn:
             
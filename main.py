@@ -1,21 +1,29 @@
+import time
+_IMPORT_STARTED_AT = time.perf_counter()
+
+# Heavy optional dependencies (pytumblr, python-telegram-bot, newspaper3k, nltk, selenium,
+# smtplib, coloredlogs) are imported inside the functions that need them, so startup only
+# pays for the features enabled in config.
 import json
 import requests
-import pytumblr
 from datetime import datetime, timedelta
-import time
 import logging
 from logging.handlers import RotatingFileHandler
-import coloredlogs
-import random
 import os
-import smtplib
-import ssl
-import telegram
-from telegram.error import TelegramError
 import asyncio
 import psycopg2 # Use PostgreSQL driver
 from psycopg2.extras import DictCursor # To get dictionary-like results
-import re
+import html
+import zlib
+import argparse
+import importlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from politeness import polite_get, wait_for_slot, record_result, should_skip_domain, log_domain_health
+from archive import stream_to_archive, archive_html, load_archived_html, enforce_retention
+from payloads import render_payloads, SEE_MORE_PLACEHOLDER
+from scheduler import is_expired, build_ready_queue, pop_best_article, requeue_article, wait_for_posting_slot, book_posting_slot
 
 # Import settings from the config file
 from config import (
@@ -28,33 +36,40 @@ from config import (
     TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, TRANSLATION_CHUNK_SIZE,
     GEMINI_TAG_COUNT, POST_TO_TUMBLR, POST_TO_TELEGRAM,
     CYCLE_COOLDOWN_MINUTES, TARGET_COUNTRY, TARGET_CATEGORY,
-    USE_SELENIUM_SCRAPING
+    USE_SELENIUM_SCRAPING, PARSE_WORKERS, PARSE_WORKER_MAX_TASKS,
+    PARSE_TIMEOUT_SECONDS, STARTUP_IMPORT_BUDGET_MS, DUPLICATE_LOOKBACK_HOURS,
+    POSTING_WINDOW_MINUTES
 )
 
-# Imports for Web Scraping
-from newspaper import Article, Config
-import nltk
-
-# Selenium Imports are only needed in scrape_full_article_text if USE_SELENIUM_SCRAPING is True.
-try:
-    from selenium import webdriver
-    from selenium.webdriver.chrome.service import Service
-    from selenium.webdriver.chrome.options import Options
-except ImportError:
-    pass
-
-
-# One-time setup for newspaper3k's dependency
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    logging.info("Downloading 'punkt' for NLTK (one-time setup)...")
-    nltk.download('punkt')
+IMPORT_TIME_MS = (time.perf_counter() - _IMPORT_STARTED_AT) * 1000
+LAZY_IMPORT_MS = {}  # module name -> ms, for startup imports done inside functions (see timed_import)
 
 # Constants
 STATUS_FETCHED = 'fetched'
 STATUS_TRANSLATED = 'translated'
 STATUS_POSTED = 'posted'
+STATUS_EXPIRED = 'expired'
+
+# Queue metadata returned by get_articles_by_status. Large bodies live in article_bodies.
+# Mixed-case columns are aliased because PostgreSQL folds unquoted names to lower case.
+ARTICLE_COLUMNS = ('a.url, a.title, a.category, a.source, a.urlToImage AS "urlToImage", a.publishedAt AS "publishedAt", '
+                   'a.status, a.title_ku, a.category_ku, a.generated_tags, a.posted_at')
+# Pre-rendered posting payloads live next to the bodies; tumblr_tags is a plain TEXT[].
+COMPRESSED_COLUMNS = ('summary', 'summary_ku', 'tumblr_caption', 'telegram_caption')
+BODY_COLUMNS = COMPRESSED_COLUMNS + ('tumblr_tags',)
+PAYLOAD_COLUMNS = ('tumblr_caption', 'tumblr_tags', 'telegram_caption')
+BODY_MIGRATION_BATCH_SIZE = 200
+
+# Post outbox: one row per posting attempt, inserted as pending and then updated with its outcome.
+# The latest row per (url, platform) wins.
+PLATFORM_TUMBLR = 'tumblr'
+PLATFORM_TELEGRAM = 'telegram'
+OUTBOX_PENDING = 'pending'  # Written before the platform call; left behind only by a crash.
+OUTBOX_SENT = 'sent'
+OUTBOX_UNVERIFIED = 'unverified'  # The platform may have published it (no verification, timeout). Never retried.
+OUTBOX_FAILED = 'failed'
+# Outcomes that count as "may be live", so the platform is never posted to again automatically.
+OUTBOX_DELIVERED = (OUTBOX_SENT, OUTBOX_UNVERIFIED, OUTBOX_PENDING)
 
 ## Database Functions
 def get_db_connection():
@@ -67,21 +82,83 @@ def init_db():
             with conn.cursor() as cursor:
                 # Note: TEXT is used for all string types. PostgreSQL is flexible.
                 cursor.execute('''CREATE TABLE IF NOT EXISTS articles (
-                                    url TEXT PRIMARY KEY, title TEXT, summary TEXT, category TEXT, 
-                                    source TEXT, urlToImage TEXT, publishedAt TEXT, 
-                                    status TEXT DEFAULT 'fetched', title_ku TEXT, summary_ku TEXT, 
+                                    url TEXT PRIMARY KEY, title TEXT, category TEXT,
+                                    source TEXT, urlToImage TEXT, publishedAt TEXT,
+                                    status TEXT DEFAULT 'fetched', title_ku TEXT,
                                     category_ku TEXT, generated_tags TEXT
                                     )''')
                 cursor.execute('''CREATE TABLE IF NOT EXISTS category_cooldowns (
                                     category_code TEXT PRIMARY KEY, 
                                     last_fetched TIMESTAMPTZ NOT NULL
                                     )''')
+                cursor.execute("ALTER TABLE articles ADD COLUMN IF NOT EXISTS posted_at TIMESTAMPTZ")
+                # Full texts are zlib-compressed by the bot, so TOAST shouldn't try to compress them again.
+                cursor.execute('''CREATE TABLE IF NOT EXISTS article_bodies (
+                                    url TEXT PRIMARY KEY REFERENCES articles (url) ON DELETE CASCADE,
+                                    summary BYTEA, summary_ku BYTEA
+                                    )''')
+                cursor.execute("ALTER TABLE article_bodies ADD COLUMN IF NOT EXISTS tumblr_caption BYTEA, ADD COLUMN IF NOT EXISTS tumblr_tags TEXT[], ADD COLUMN IF NOT EXISTS telegram_caption BYTEA")
+                cursor.execute('''ALTER TABLE article_bodies ALTER COLUMN summary SET STORAGE EXTERNAL, ALTER COLUMN summary_ku SET STORAGE EXTERNAL,
+                                  ALTER COLUMN tumblr_caption SET STORAGE EXTERNAL, ALTER COLUMN telegram_caption SET STORAGE EXTERNAL''')
+                cursor.execute('''CREATE TABLE IF NOT EXISTS post_outbox (
+                                    id BIGSERIAL PRIMARY KEY,
+                                    url TEXT NOT NULL REFERENCES articles (url) ON DELETE CASCADE,
+                                    platform TEXT NOT NULL, outcome TEXT NOT NULL, remote_id TEXT,
+                                    attempted_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+                                    )''')
+                cursor.execute("CREATE INDEX IF NOT EXISTS post_outbox_url_platform_idx ON post_outbox (url, platform, id)")
                 conn.commit()
+            migrate_bodies_out_of_articles(conn)
         logging.info("🗃️ Database initialized successfully.")
     except Exception as e:
         logging.critical(f"❌ Failed to initialize database: {e}")
         raise
 
+def compress_text(text):
+    return zlib.compress(text.encode('utf-8')) if text is not None else None
+
+def decompress_text(data):
+    return zlib.decompress(data).decode('utf-8') if data is not None else None
+
+def migrate_bodies_out_of_articles(conn):
+    """Moves full texts still stored inline in `articles` (older layout) into `article_bodies`,
+    then drops the inline columns. Does nothing once they are gone."""
+    with conn.cursor() as cursor:
+        cursor.execute('''SELECT 1 FROM information_schema.columns
+                          WHERE table_name = 'articles' AND column_name IN ('summary', 'summary_ku')''')
+        if cursor.fetchone() is None:
+            return
+        cursor.execute("SELECT url FROM articles WHERE summary IS NOT NULL OR summary_ku IS NOT NULL")
+        urls = [row[0] for row in cursor.fetchall()]
+    if urls:
+        logging.info(f"🗃️ Moving {len(urls)} article bodies into compressed storage...")
+    for i in range(0, len(urls), BODY_MIGRATION_BATCH_SIZE):
+        batch = urls[i:i + BODY_MIGRATION_BATCH_SIZE]
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT url, summary, summary_ku FROM articles WHERE url = ANY(%s)", (batch,))
+            rows = [(url, compress_text(summary), compress_text(summary_ku)) for url, summary, summary_ku in cursor.fetchall()]
+            psycopg2.extras.execute_values(
+                cursor,
+                '''INSERT INTO article_bodies (url, summary, summary_ku) VALUES %s ON CONFLICT (url) DO UPDATE SET
+                   summary = COALESCE(EXCLUDED.summary, article_bodies.summary),
+                   summary_ku = COALESCE(EXCLUDED.summary_ku, article_bodies.summary_ku)''',
+                rows
+            )
+            cursor.execute("UPDATE articles SET summary = NULL, summary_ku = NULL WHERE url = ANY(%s)", (batch,))
+            conn.commit()
+    # Dropping is instant; the space comes back with the next rewrite (`db_reset_utility.py purge-bodies --full-vacuum`).
+    with conn.cursor() as cursor:
+        cursor.execute("ALTER TABLE articles DROP COLUMN IF EXISTS summary, DROP COLUMN IF EXISTS summary_ku")
+        conn.commit()
+    logging.info("🗃️ Dropped the inline body columns from 'articles'.")
+
+def save_article_body(cursor, url, column, text):
+    """Upserts one compressed body column. The caller commits."""
+    assert column in COMPRESSED_COLUMNS
+    cursor.execute(f'''INSERT INTO article_bodies (url, {column}) VALUES (%s, %s)
+                      ON CONFLICT (url) DO UPDATE SET {column} = EXCLUDED.{column}''',
+                   (url, compress_text(text)))
+
 def is_url_in_db(conn, url):
     with conn.cursor() as cursor:
         cursor.execute("SELECT 1 FROM articles WHERE url = %s", (url,))
@@ -89,32 +166,131 @@ def is_url_in_db(conn, url):
 
 def add_articles_to_db(conn, articles):
     with conn.cursor() as cursor:
-        articles_to_insert = [(a['url'], a['title'], a['summary'], a['category'], a['source'], a['urlToImage'], a['publishedAt'], a['status'], a['category_ku']) for a in articles]
+        articles_to_insert = [(a['url'], a['title'], a['category'], a['source'], a['urlToImage'], a['publishedAt'], a['status'], a['category_ku']) for a in articles]
         # Use executemany for batch inserts
         psycopg2.extras.execute_values(
             cursor,
-            'INSERT INTO articles (url, title, summary, category, source, urlToImage, publishedAt, status, category_ku) VALUES %s ON CONFLICT (url) DO NOTHING',
+            'INSERT INTO articles (url, title, category, source, urlToImage, publishedAt, status, category_ku) VALUES %s ON CONFLICT (url) DO NOTHING',
             articles_to_insert
         )
+        psycopg2.extras.execute_values(
+            cursor,
+            'INSERT INTO article_bodies (url, summary) VALUES %s ON CONFLICT (url) DO NOTHING',
+            [(a['url'], compress_text(a['summary'])) for a in articles]
+        )
         conn.commit()
 
-def get_articles_by_status(conn, status):
+def get_articles_by_status(conn, status, bodies=()):
+    """Returns queue metadata for articles in a status. Only the body columns named in
+    `bodies` (see BODY_COLUMNS) are loaded, and decompressed where needed."""
+    assert all(column in BODY_COLUMNS for column in bodies)
+    body_select = ''.join(f", b.{column}" for column in bodies)
+    join = " LEFT JOIN article_bodies b ON b.url = a.url" if bodies else ""
     # Use DictCursor to get results as dictionaries
     with conn.cursor(cursor_factory=DictCursor) as cursor:
-        cursor.execute("SELECT * FROM articles WHERE status = %s", (status,))
-        # DictCursor results are already dictionary-like
-        return [dict(row) for row in cursor.fetchall()]
+        cursor.execute(f"SELECT {ARTICLE_COLUMNS}{body_select} FROM articles a{join} WHERE a.status = %s", (status,))
+        articles = [dict(row) for row in cursor.fetchall()]
+    for article in articles:
+        for column in bodies:
+            if column in COMPRESSED_COLUMNS:
+                article[column] = decompress_text(article[column])
+    return articles
+
+def get_articles_missing_payloads(conn):
+    """Translated articles whose posting payloads haven't been rendered yet, with their translated summary."""
+    with conn.cursor(cursor_factory=DictCursor) as cursor:
+        cursor.execute(f'''SELECT {ARTICLE_COLUMNS}, b.summary_ku FROM articles a JOIN article_bodies b ON b.url = a.url
+                           WHERE a.status = %s AND b.telegram_caption IS NULL''', (STATUS_TRANSLATED,))
+        articles = [dict(row) for row in cursor.fetchall()]
+    for article in articles:
+        article['summary_ku'] = decompress_text(article['summary_ku'])
+    return articles
+
+def save_article_payloads(conn, payloads):
+    """Stores rendered (url, tumblr_caption, tumblr_tags, telegram_caption) rows in one batch."""
+    if not payloads: return
+    with conn.cursor() as cursor:
+        psycopg2.extras.execute_values(
+            cursor,
+            '''UPDATE article_bodies AS b SET tumblr_caption = v.tumblr_caption, tumblr_tags = v.tumblr_tags,
+               telegram_caption = v.telegram_caption FROM (VALUES %s) AS v (url, tumblr_caption, tumblr_tags, telegram_caption)
+               WHERE b.url = v.url''',
+            [(url, compress_text(tumblr_caption), tags, compress_text(telegram_caption)) for url, tumblr_caption, tags, telegram_caption in payloads],
+            template='(%s, %s::bytea, %s::text[], %s::bytea)'
+        )
+        conn.commit()
 
 def update_article_translation(conn, url, title_ku, summary_ku, tags_json):
     with conn.cursor() as cursor:
-        cursor.execute('UPDATE articles SET title_ku = %s, summary_ku = %s, generated_tags = %s, status = %s WHERE url = %s', 
-                        (title_ku, summary_ku, tags_json, STATUS_TRANSLATED, url))
+        cursor.execute('UPDATE articles SET title_ku = %s, generated_tags = %s, status = %s WHERE url = %s', 
+                        (title_ku, tags_json, STATUS_TRANSLATED, url))
+        save_article_body(cursor, url, 'summary_ku', summary_ku)
+        # A new translation invalidates any payloads rendered from the previous one.
+        cursor.execute("UPDATE article_bodies SET tumblr_caption = NULL, tumblr_tags = NULL, telegram_caption = NULL WHERE url = %s", (url,))
+        conn.commit()
+
+def update_article_summary(conn, url, summary):
+    """Replaces the scraped text and sends the article back through translation."""
+    with conn.cursor() as cursor:
+        cursor.execute("UPDATE articles SET status = %s WHERE url = %s", (STATUS_FETCHED, url))
+        save_article_body(cursor, url, 'summary', summary)
         conn.commit()
 
 def update_article_status(conn, url, status):
+    update_articles_status(conn, [url], status)
+
+def update_articles_status(conn, urls, status):
+    """Moves many articles to a status in one statement and one commit."""
+    if not urls: return
+    with conn.cursor() as cursor:
+        cursor.execute("UPDATE articles SET status = %s, posted_at = CASE WHEN %s = %s THEN NOW() ELSE posted_at END WHERE url = ANY(%s)",
+                       (status, status, STATUS_POSTED, list(urls)))
+        conn.commit()
+
+def get_recently_posted_titles(conn, hours):
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT title FROM articles WHERE status = %s AND posted_at > NOW() - make_interval(hours => %s)",
+                       (STATUS_POSTED, hours))
+        return [row[0] for row in cursor.fetchall()]
+
+def get_outbox_state(conn, urls):
+    """Returns the latest outbox outcome per article and platform as {url: {platform: (outcome, remote_id)}}."""
+    state = {}
+    if not urls: return state
     with conn.cursor() as cursor:
-        cursor.execute("UPDATE articles SET status = %s WHERE url = %s", (status, url))
+        cursor.execute('''SELECT DISTINCT ON (url, platform) url, platform, outcome, remote_id FROM post_outbox
+                          WHERE url = ANY(%s) ORDER BY url, platform, id DESC''', (list(urls),))
+        for url, platform, outcome, remote_id in cursor.fetchall():
+            state.setdefault(url, {})[platform] = (outcome, remote_id)
+    return state
+
+def record_outbox_intent(conn, url, platform):
+    """Durably records that a post is about to be sent and returns the outbox row ID. A restart that
+    finds this row still pending assumes the post went out rather than risk a duplicate."""
+    with conn.cursor() as cursor:
+        cursor.execute("INSERT INTO post_outbox (url, platform, outcome) VALUES (%s, %s, %s) RETURNING id", (url, platform, OUTBOX_PENDING))
+        outbox_id = cursor.fetchone()[0]
         conn.commit()
+    return outbox_id
+
+def record_outbox_outcome(conn, outbox_id, outcome, remote_id):
+    """Fills in the outcome of an attempt and commits it straight away, before the next posting-rate pause."""
+    with conn.cursor() as cursor:
+        cursor.execute("UPDATE post_outbox SET outcome = %s, remote_id = %s WHERE id = %s",
+                       (outcome, str(remote_id) if remote_id else None, outbox_id))
+        conn.commit()
+
+def is_delivered(platform_state):
+    """True if the outbox shows the article reached (or may have reached) any platform."""
+    return any(outcome in OUTBOX_DELIVERED for outcome, _ in platform_state.values())
+
+def platforms_to_attempt(platform_state, enabled_platforms):
+    """Decides which platforms still need a post, given an article's outbox state.
+    Until something has been delivered every enabled platform is (re)tried, matching the
+    retry-next-cycle behaviour. After a delivery, only platforms that were never attempted are posted to."""
+    if not is_delivered(platform_state):
+        return list(enabled_platforms)
+    return [platform for platform in enabled_platforms if platform not in platform_state]
 
 def is_on_cooldown(conn, category_code):
     # 🎯 FIX: Bypass cooldown logic if FETCH_COOLDOWN_HOURS is 0
@@ -148,6 +324,8 @@ def update_cooldown_timestamp(conn, category_code):
 ## Helper Functions
 def send_failure_email(article_title):
     if not EMAIL_NOTIFICATIONS_ENABLED or not all([SENDER_EMAIL, SENDER_PASSWORD, RECIPIENT_EMAIL]): return
+    import smtplib
+    import ssl
     message = f"Subject: Tumblr Bot Alert: Post Dropped\n\nScript stopped because a post was dropped.\nFailed Article: {article_title}"
     try:
         context = ssl.create_default_context()
@@ -183,25 +361,118 @@ def is_image_url_valid(url):
         logging.warning(f"Image validation failed (GET request error) for {url} (Error: {e})")
         return False
 
+def timed_import(module_name):
+    """Imports a module from inside a function and records how long it took for the startup report."""
+    started = time.perf_counter()
+    module = importlib.import_module(module_name)
+    LAZY_IMPORT_MS.setdefault(module_name, (time.perf_counter() - started) * 1000)
+    return module
+
+## Parsing Worker Pool
+# Parsing runs in worker processes; only raw HTML bytes go in and plain text comes out.
+_parse_pool = None
+
+def _init_parse_worker(nltk_lock):
+    """Warms up a parsing worker so its first task doesn't pay for the heavy imports.
+    Only the workers use nltk, so the one-time 'punkt' download happens here, one worker at a time."""
+    import newspaper
+    import nltk
+    with nltk_lock:
+        try:
+            nltk.data.find('tokenizers/punkt')
+        except LookupError:
+            nltk.download('punkt', quiet=True)
+
+def get_parse_pool():
+    """Returns the shared parsing pool, creating it on first use."""
+    global _parse_pool
+    if _parse_pool is None:
+        # max_tasks_per_child requires spawned workers; the lock must come from the same context.
+        context = multiprocessing.get_context('spawn')
+        _parse_pool = ProcessPoolExecutor(
+            max_workers=PARSE_WORKERS,
+            mp_context=context,
+            initializer=_init_parse_worker,
+            initargs=(context.Lock(),),
+            max_tasks_per_child=PARSE_WORKER_MAX_TASKS
+        )
+    return _parse_pool
+
+def reset_parse_pool():
+    """Discards a broken parsing pool so the next call starts fresh workers."""
+    global _parse_pool
+    if _parse_pool is not None:
+        _parse_pool.shutdown(wait=False, cancel_futures=True)
+        _parse_pool = None
+
+def get_declared_encoding(encoding):
+    """requests reports ISO-8859-1 for any text/html response without a charset, so, like newspaper3k,
+    treat it as unknown. None means the parser reads <meta charset> or sniffs the bytes itself."""
+    if not encoding or encoding.lower() == 'iso-8859-1':
+        return None
+    return encoding
+
+def parse_article_html(url, html_bytes, encoding=None):
+    """Worker task: extracts the article body from raw HTML bytes with newspaper3k."""
+    from newspaper import Article, Config
+    encoding = get_declared_encoding(encoding)
+    # Raw bytes let newspaper3k detect the charset from the document itself.
+    page = html_bytes.decode(encoding, errors='replace') if encoding else html_bytes
+    article = Article(url, config=Config())
+    article.download(input_html=page)
+    article.parse()
+    return article.text
+
+def submit_article_parse(url, html_bytes, encoding=None):
+    """Queues an HTML document for parsing and returns a future, or None if the pool is unavailable."""
+    try:
+        return get_parse_pool().submit(parse_article_html, url, html_bytes, encoding)
+    except (BrokenProcessPool, RuntimeError) as e:
+        logging.error(f"Parsing pool unavailable, restarting it. Error: {e}")
+        reset_parse_pool()
+        return None
+
+def collect_article_text(url, future):
+    """Waits for a parse future and applies the minimum length check."""
+    if future is None:
+        return None
+    try:
+        text = future.result(timeout=PARSE_TIMEOUT_SECONDS)
+    except BrokenProcessPool as e:
+        logging.error(f"Parsing worker crashed while parsing {url}. Error: {e}")
+        reset_parse_pool()
+        return None
+    except Exception as e:
+        logging.error(f"Failed to parse article at {url}. Error: {e}")
+        return None
+    if len(text) < 250:
+        logging.warning(f"Scraped text is too short (<250 chars). Skipping. URL: {url}")
+        return None
+    return text
+
 ## Core API & Scraping Functions
-def scrape_full_article_text(url):
-    """Scrapes article text. Uses Selenium if enabled, otherwise uses newspaper3k directly."""
+def fetch_article_html(url, offline=False):
+    """Downloads an article page and returns its raw bytes and declared encoding (None if unknown). Uses Selenium if enabled.
+    All downloads go through the per-domain politeness scheduler and are archived as they stream in.
+    With offline=True the page is read from the HTML archive instead."""
+    if offline:
+        return load_archived_html(url)
     if not USE_SELENIUM_SCRAPING:
+        response = polite_get(url, timeout=10, stream=True)
+        if response is None:
+            return None, None
+        encoding = get_declared_encoding(response.encoding)
         try:
-            config = Config()
-            config.browser_user_agent = f'DANA News Bot/1.0 (Contact: {CONTACT_EMAIL}; Blog: {BLOG_URL})'
-            config.request_timeout = 10
-            article = Article(url, config=config)
-            article.download()
-            article.parse()
-            if len(article.text) < 250:
-                logging.warning(f"Scraped text is too short (<250 chars). Skipping. URL: {url}")
-                return None
-            return article.text
-        except Exception as e:
-            logging.error(f"Failed to scrape article at {url} with newspaper3k. Error: {e}")
-            return None
+            html_bytes = stream_to_archive(url, response, encoding)
+        except requests.exceptions.RequestException as e:
+            logging.error(f"Failed to download article at {url}. Error: {e}")
+            return None, None
+        finally:
+            response.close()
+        return html_bytes, encoding
     else:
+        if not wait_for_slot(url):
+            return None, None
         logging.info(f"    -> Using Selenium to scrape: {url}")
         driver = None
         try:
@@ -217,24 +488,18 @@ def scrape_full_article_text(url):
             driver = webdriver.Chrome(service=service, options=chrome_options)
             driver.get(url)
             time.sleep(3)
-            page_source = driver.page_source
-
-            config = Config()
-            config.browser_user_agent = f'DANA News Bot/1.0 (Contact: {CONTACT_EMAIL}; Blog: {BLOG_URL})'
-            article = Article(url, config=config)
-            article.download(input_html=page_source)
-            article.parse()
-
-            if len(article.text) < 250:
-                logging.warning(f"Scraped text (via Selenium) is too short. Skipping.")
-                return None
-            return article.text
+            html_bytes = driver.page_source.encode('utf-8')
         except Exception as e:
+            record_result(url, None)
             logging.error(f"Failed to scrape article at {url} with Selenium. Error: {e}")
-            return None
+            return None, None
         finally:
             if driver:
                 driver.quit()
+        # WebDriver doesn't expose the HTTP status, so only network-level failures count against the domain.
+        record_result(url, 200)
+        archive_html(url, html_bytes, 'utf-8')
+        return html_bytes, 'utf-8'
 
 # 🎯 CRITICAL FIX: If image is invalid or missing, the entire article is skipped.
 def fetch_and_filter_news(conn, country, category_code, category_config):
@@ -260,11 +525,17 @@ def fetch_and_filter_news(conn, country, category_code, category_config):
 
             if data.get('status') == 'ok':
                 logging.info(f"    - Successfully fetched using API key ending in '...{api_key[-4:]}'")
-                new_articles = []
+                # Pages are downloaded here while earlier ones are still parsing in the worker pool.
+                pending = []
                 for article in data.get('articles', []):
                     article_url = article.get('url')
                     if not article_url or is_url_in_db(conn, article_url):
                         continue
+
+                    # Don't spend an image check on publishers that are currently blocking us.
+                    if should_skip_domain(article_url):
+                        logging.info(f"    -> Skipping article: domain is backing off: {article_url}")
+                        continue
                     
                     image_url = article.get('urlToImage', None)
 
@@ -279,11 +550,20 @@ def fetch_and_filter_news(conn, country, category_code, category_config):
                         continue
                     
                     logging.info(f"    -> Scraping full text for: {article_url}")
-                    full_text = scrape_full_article_text(article_url)
+                    html_bytes, encoding = fetch_article_html(article_url)
+                    if not html_bytes:
+                        logging.warning("    -> Skipping article due to scraping failure.")
+                        continue
+                    pending.append((article, image_url, submit_article_parse(article_url, html_bytes, encoding)))
+
+                new_articles = []
+                for article, image_url, future in pending:
+                    article_url = article['url']
+                    full_text = collect_article_text(article_url, future)
                     if not full_text:
-                        logging.warning("    -> Skipping article due to scraping failure or short content.")
+                        logging.warning(f"    -> Skipping article due to parsing failure or short content: {article_url}")
                         continue
-                        
+
                     new_articles.append({
                         "url": article_url, "title": article.get('title', 'No Title'), "summary": full_text,
                         "category": category_code, "source": article.get('source', {}).get('name', 'N/A'),
@@ -331,81 +611,77 @@ def translate_articles_gemini(articles_to_translate):
 ## Posting Functions & Main Logic
 # 🔥 FIXED: Added defensive check to prevent KeyError crash and guarantee image URL presence.
 def post_to_tumblr(client, article):
+    """Sends the caption and tags pre-rendered by prerender_payloads.
+    Returns (outcome, post_id). Once Tumblr has handed out a post ID the outcome is never OUTBOX_FAILED,
+    since a retry could publish a duplicate."""
     logging.info(f"▶️ Posting to Tumblr '{article.get('title_ku', 'No Title')[:30]}...'")
-    tags = [article['category_ku'], article['source']]
-    try:
-        if article.get('generated_tags'): tags.extend(json.loads(article['generated_tags']))
-    except json.JSONDecodeError: logging.warning("Could not parse generated_tags from database.")
     
     # 🎯 Defensive Check for Image URL (must be present if it passed filtering)
     image_url = article.get('urlToImage')
     if not image_url:
         logging.warning("Skipping Tumblr post: Article missing required 'urlToImage' data.")
-        return None
+        return OUTBOX_FAILED, None
         
-    full_summary_html = article['summary_ku']
-    source_html = f"<p class='text-center'><a class='link-secondary link-offset-3' href='{article['url']}' target='_blank'>{article['source']}</a></p>"
-    
     try:
-        summary_with_more_tag = full_summary_html.replace('</p>', '</p>[[MORE]]', 1)
-        caption_html = f"<h5 class='card-title lh-base pt-1'>{article['title_ku']}</h5>{summary_with_more_tag}{source_html}"
-        
         # Create a PHOTO post, safely using the retrieved image_url
-        response = client.create_photo(TUMBLR_BLOG_NAME, state="published", tags=tags, source=image_url, caption=caption_html, link=article['url'], format="html")
+        response = client.create_photo(TUMBLR_BLOG_NAME, state="published", tags=article['tumblr_tags'], source=image_url, caption=article['tumblr_caption'], link=article['url'], format="html")
         
         post_id = response.get('id')
         if not post_id:
             logging.critical("CRITICAL: Post dropped by Tumblr spam filter.")
             send_failure_email(article.get('title_ku', 'N/A'))
-            return None
+            return OUTBOX_FAILED, None
+    except Exception as e:
+        # This catches API/network errors, not missing keys.
+        logging.error(f"An exception occurred during posting to Tumblr: {e}")
+        return OUTBOX_FAILED, None
 
+    try:
         time.sleep(3)
         # Attempt to verify post existence
         if client.posts(TUMBLR_BLOG_NAME, id=post_id).get('posts'):
             logging.info(f"  - ✅ Verified Tumblr Photo Post ID: {post_id}")
-            return post_id
-        else:
-            logging.warning("  - VERIFICATION FAILED. Post may have been dropped.")
-            send_failure_email(article.get('title_ku', 'N/A'))
-            return None
+            return OUTBOX_SENT, post_id
+        logging.warning(f"  - VERIFICATION FAILED for post {post_id}. It may have been dropped; not retrying automatically.")
     except Exception as e:
-        # This catches API/network errors, not missing keys.
-        logging.error(f"An exception occurred during posting to Tumblr: {e}")
-        return None
+        logging.warning(f"  - Could not verify Tumblr post {post_id}; not retrying automatically. Error: {e}")
+    send_failure_email(article.get('title_ku', 'N/A'))
+    return OUTBOX_UNVERIFIED, post_id
 
 # 🔥 FIXED: Enforced image requirement for Telegram to avoid text-only posts being marked as success.
 async def async_post_to_telegram(telegram_bot, article, see_more_url):
-    if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHAT_ID: return False
+    """Sends the caption pre-rendered by prerender_payloads. Returns (outcome, message_id).
+    A timeout may still have delivered the message, so it is reported as OUTBOX_UNVERIFIED."""
+    if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHAT_ID: return OUTBOX_FAILED, None
+    from telegram.error import TelegramError, TimedOut
     logging.info(f"▶️ Posting summary to Telegram: '{article.get('title_ku', 'No Title')[:30]}...'")
-    title_ku, summary_html = article['title_ku'], article['summary_ku']
-    
-    plain_text_summary = re.sub('<[^<]+?>', '', summary_html).strip()
-    preview_text = (plain_text_summary[:450] + '...') if len(plain_text_summary) > 450 else plain_text_summary
-    
-    post_text = f"<b>{title_ku}</b>\n\n{preview_text}\n\n<i><a href='{see_more_url}'>درێژەی بابەت...</a></i>"
+    post_text = article['telegram_caption'].replace(SEE_MORE_PLACEHOLDER, html.escape(see_more_url))
     
     try:
         image_url = article.get('urlToImage')
         
-        # 🎯 Enforce Image Requirement: If no image, return False immediately.
+        # 🎯 Enforce Image Requirement: If no image, fail immediately.
         if not image_url:
             logging.warning("  - ❌ Skipping Telegram post: Article is missing required 'urlToImage' for a media post.")
-            return False
+            return OUTBOX_FAILED, None
 
         # Send as photo with caption
-        await telegram_bot.send_photo(chat_id=TELEGRAM_CHAT_ID, photo=image_url, caption=post_text, parse_mode='HTML')
+        message = await telegram_bot.send_photo(chat_id=TELEGRAM_CHAT_ID, photo=image_url, caption=post_text, parse_mode='HTML')
             
-        logging.info("  - ✅ Telegram photo post sent successfully.")
-        return True
+        logging.info(f"  - ✅ Telegram photo post sent successfully. Message ID: {message.message_id}")
+        return OUTBOX_SENT, message.message_id
+    except TimedOut as e:
+        logging.warning(f"⚠️ Telegram timed out; the message may still have been delivered. Not retrying automatically (Error: {e}).")
+        return OUTBOX_UNVERIFIED, None
     except TelegramError as e:
         # This catches errors like Telegram failing to fetch the provided image URL.
         # This is the message you need to debug the Telegram API failure!
         logging.error(f"❌ Telegram photo posting failed (Error: {e}).")
-        return False
+        return OUTBOX_FAILED, None
         
     except Exception as e:
         logging.error(f"❌ An unexpected error occurred during Telegram posting: {e}")
-        return False
+        return OUTBOX_FAILED, None
         
 def post_to_telegram(telegram_bot, article, see_more_url):
     try:
@@ -413,11 +689,53 @@ def post_to_telegram(telegram_bot, article, see_more_url):
         return loop.run_until_complete(async_post_to_telegram(telegram_bot, article, see_more_url))
     except Exception as e:
         logging.error(f"❌ Synchronous Telegram wrapper failed: {e}")
-        return False
+        return OUTBOX_FAILED, None
         
 async def async_check_telegram(telegram_bot):
     await telegram_bot.get_me()
 
+def create_tumblr_client():
+    pytumblr = timed_import('pytumblr')
+    return pytumblr.TumblrRestClient(TUMBLR_CONSUMER_KEY, TUMBLR_CONSUMER_SECRET, TUMBLR_OAUTH_TOKEN, TUMBLR_OAUTH_SECRET)
+
+def create_telegram_bot():
+    telegram = timed_import('telegram')
+    return telegram.Bot(token=TELEGRAM_BOT_TOKEN)
+
+async def async_check_credentials(tumblr_client, telegram_bot):
+    """Runs the Tumblr (blocking, in a thread) and Telegram credential checks concurrently."""
+    checks = []
+    if tumblr_client:
+        checks.append(asyncio.get_running_loop().run_in_executor(None, tumblr_client.info))
+    if telegram_bot:
+        checks.append(async_check_telegram(telegram_bot))
+    await asyncio.gather(*checks)
+
+def prerender_payloads(conn):
+    """Precompute step after translation: validates each new translation and renders its Tumblr
+    caption, tag list and Telegram caption, so posting and retries only send them.
+    Rendering is a few string operations, so it runs here rather than in the parsing pool.
+    Unusable translations go back to the translation queue."""
+    articles = get_articles_missing_payloads(conn)
+    if not articles: return
+    rendered, invalid_urls = [], []
+    for article in articles:
+        try:
+            article['generated_tags'] = json.loads(article['generated_tags']) if article.get('generated_tags') else []
+        except json.JSONDecodeError:
+            logging.warning("Could not parse generated_tags from database.")
+            article['generated_tags'] = []
+        try:
+            rendered.append(render_payloads(article))
+        except ValueError as e:
+            logging.warning(f"    -> Translation of '{article['url']}' is unusable ({e}). Sending it back for translation.")
+            invalid_urls.append(article['url'])
+        except Exception as e:
+            logging.error(f"Failed to render payloads for {article['url']}. Will retry next cycle. Error: {e}")
+    save_article_payloads(conn, rendered)
+    update_articles_status(conn, invalid_urls, STATUS_FETCHED)
+    logging.info(f"Pre-rendered posting payloads for {len(rendered)} articles.")
+
 def run_cycle(tumblr_client, telegram_bot, selected_country, selected_category_key):
     logging.info("--- Starting new cycle ---")
     try:
@@ -435,7 +753,13 @@ def run_cycle(tumblr_client, telegram_bot, selected_country, selected_category_k
                     add_articles_to_db(conn, new_articles)
                     update_cooldown_timestamp(conn, category_code)
 
-            articles_to_translate = get_articles_by_status(conn, STATUS_FETCHED)
+            articles_to_translate = get_articles_by_status(conn, STATUS_FETCHED, bodies=('summary',))
+            # Don't spend translation on articles that are already too old to post.
+            stale_urls = [a['url'] for a in articles_to_translate if is_expired(a)]
+            if stale_urls:
+                update_articles_status(conn, stale_urls, STATUS_EXPIRED)
+                logging.info(f"Expired {len(stale_urls)} untranslated articles older than the posting window.")
+                articles_to_translate = [a for a in articles_to_translate if a['url'] not in stale_urls]
             if articles_to_translate:
                 # 📢 IMPROVED LOG: Show queue size for translation
                 logging.info(f"\n--- Found {len(articles_to_translate)} articles to translate (Queue Size) ---")
@@ -448,54 +772,161 @@ def run_cycle(tumblr_client, telegram_bot, selected_country, selected_category_k
                         update_article_translation(conn, item['id'], item['title'], item['summary'], tags_json)
                     logging.info("Chunk translated and saved to DB.")
 
-            articles_to_post = get_articles_by_status(conn, STATUS_TRANSLATED)
+            prerender_payloads(conn)
+
+            articles_to_post = get_articles_by_status(conn, STATUS_TRANSLATED, bodies=PAYLOAD_COLUMNS)
+            # Articles whose payloads failed to render are retried by prerender_payloads next cycle.
+            articles_to_post = [a for a in articles_to_post if a['telegram_caption'] and a['tumblr_caption']]
             if articles_to_post:
                 if POST_TO_TUMBLR or POST_TO_TELEGRAM:
                     # 📢 IMPROVED LOG: Show queue size for posting
                     logging.info(f"\n--- Found {len(articles_to_post)} translated articles to post (Queue Size) ---")
                     
-                    articles_to_post.sort(
-                        key=lambda x: x.get('publishedAt', datetime.min.isoformat()), 
-                        reverse=False
-                    )
-                    
-                    for article in articles_to_post:
-                        tumblr_post_id, telegram_posted = None, False
-                        
-                        if POST_TO_TUMBLR:
-                            tumblr_post_id = post_to_tumblr(tumblr_client, article)
-                            
-                        # Post to Telegram using the Tumblr URL if available
-                        if POST_TO_TELEGRAM:
-                            # Pass article['url'] if Tumblr failed or is disabled
-                            see_more_url = f"https://{TUMBLR_BLOG_NAME}.tumblr.com/post/{tumblr_post_id}" if tumblr_post_id else article['url']
-                            telegram_posted = post_to_telegram(telegram_bot, article, see_more_url)
-                            
-                        # Only mark as posted if at least one platform successfully posted a media version
-                        if tumblr_post_id or telegram_posted:
-                            update_article_status(conn, article['url'], STATUS_POSTED)
-                            logging.info(f"Article '{article['title_ku'][:30]}...' marked as posted.")
-                            pause = random.uniform(180, 300)
-                            logging.info(f"    - Pausing for {pause:.1f} seconds...")
-                            time.sleep(pause)
-                        else:
-                            # If all attempts failed (including media-required Telegram post), it retries next cycle
-                            logging.warning("All active posts failed for article. It will be retried next cycle.")
+                    enabled_platforms = [platform for platform, enabled in ((PLATFORM_TUMBLR, POST_TO_TUMBLR), (PLATFORM_TELEGRAM, POST_TO_TELEGRAM)) if enabled]
+                    outbox_state = get_outbox_state(conn, [a['url'] for a in articles_to_post])
+                    posted_urls = []
+
+                    # Highest score first (freshness, category/source weight, similarity to recent posts).
+                    # An article stays queued until every enabled platform has attempted it. Partially delivered
+                    # articles are never expired; once too old they are marked posted with the platforms they reached.
+                    expired_urls = [a['url'] for a in articles_to_post if is_expired(a) and not is_delivered(outbox_state.get(a['url'], {}))]
+                    recent_titles = get_recently_posted_titles(conn, DUPLICATE_LOOKBACK_HOURS)
+                    ready_queue = build_ready_queue([a for a in articles_to_post if a['url'] not in expired_urls], recent_titles)
+                    stage_deadline = time.monotonic() + POSTING_WINDOW_MINUTES * 60
+                    try:
+                        while ready_queue:
+                            if time.monotonic() > stage_deadline:
+                                logging.info(f"Posting window of {POSTING_WINDOW_MINUTES} minutes used up. {len(ready_queue)} articles wait for the next cycle.")
+                                break
+                            # Wait for the next platform slot any queued article still needs, then take the best
+                            # article for the platforms that are due. Each platform keeps to its own rate.
+                            needed = [p for p in enabled_platforms if any(p in platforms_to_attempt(outbox_state.get(a['url'], {}), enabled_platforms) for _, _, a in ready_queue)]
+                            due = wait_for_posting_slot(needed) if needed else []
+                            article, score, held = None, 0.0, []
+                            while ready_queue and article is None:
+                                candidate, candidate_score = pop_best_article(ready_queue, recent_titles)
+                                wanted = platforms_to_attempt(outbox_state.get(candidate['url'], {}), enabled_platforms)
+                                if is_expired(candidate) or not wanted or any(p in due for p in wanted):
+                                    article, score = candidate, candidate_score
+                                else:
+                                    held.append((candidate, candidate_score))
+                            for candidate, candidate_score in held:
+                                requeue_article(ready_queue, candidate, candidate_score)
+                            if article is None:
+                                continue
+                            platform_state = outbox_state.setdefault(article['url'], {})
+                            if is_expired(article):
+                                # Aged out while waiting for a posting slot.
+                                if is_delivered(platform_state):
+                                    posted_urls.append(article['url'])
+                                    logging.info(f"Article '{article['title_ku'][:30]}...' aged out before reaching every platform; marked as posted.")
+                                else:
+                                    expired_urls.append(article['url'])
+                                continue
+                            attempts = platforms_to_attempt(platform_state, enabled_platforms)
+                            if platform_state and len(attempts) < len(enabled_platforms):
+                                logging.info(f"Continuing '{article['title_ku'][:30]}...': already attempted on {', '.join(platform_state)}.")
+                            if any(outcome == OUTBOX_PENDING for outcome, _ in platform_state.values()):
+                                logging.warning("    - An earlier run stopped mid-post for this article. Assuming it was delivered; not re-posting.")
+                            # A platform whose slot isn't open yet gets this article later in the stage.
+                            attempts = [p for p in attempts if p in due]
+                            if attempts:
+                                logging.info(f"    - Next up (score {score:.3f}): '{article['title'][:50]}'")
+
+                            tumblr_outcome, tumblr_post_id = platform_state.get(PLATFORM_TUMBLR, (None, None))
+
+                            if PLATFORM_TUMBLR in attempts:
+                                outbox_id = record_outbox_intent(conn, article['url'], PLATFORM_TUMBLR)
+                                tumblr_outcome, tumblr_post_id = post_to_tumblr(tumblr_client, article)
+                                book_posting_slot([PLATFORM_TUMBLR])
+                                record_outbox_outcome(conn, outbox_id, tumblr_outcome, tumblr_post_id)
+                                platform_state[PLATFORM_TUMBLR] = (tumblr_outcome, tumblr_post_id)
+
+                            # Post to Telegram using the Tumblr URL if available
+                            if PLATFORM_TELEGRAM in attempts:
+                                # Pass article['url'] if Tumblr failed, couldn't be verified or is disabled
+                                see_more_url = f"https://{TUMBLR_BLOG_NAME}.tumblr.com/post/{tumblr_post_id}" if tumblr_outcome == OUTBOX_SENT and tumblr_post_id else article['url']
+                                outbox_id = record_outbox_intent(conn, article['url'], PLATFORM_TELEGRAM)
+                                telegram_outcome, message_id = post_to_telegram(telegram_bot, article, see_more_url)
+                                book_posting_slot([PLATFORM_TELEGRAM])
+                                record_outbox_outcome(conn, outbox_id, telegram_outcome, message_id)
+                                platform_state[PLATFORM_TELEGRAM] = (telegram_outcome, message_id)
+
+                            # Only mark as posted if at least one platform successfully posted a media version
+                            # and every enabled platform has had its attempt.
+                            remaining = platforms_to_attempt(platform_state, enabled_platforms)
+                            if is_delivered(platform_state) and remaining:
+                                logging.info(f"    - Waiting for a {', '.join(remaining)} slot to finish this article.")
+                                requeue_article(ready_queue, article, score)
+                            elif is_delivered(platform_state):
+                                posted_urls.append(article['url'])
+                                recent_titles.append(article['title'])
+                                logging.info(f"Article '{article['title_ku'][:30]}...' marked as posted.")
+                            else:
+                                # If all attempts failed (including media-required Telegram post), it retries next cycle
+                                logging.warning("All active posts failed for article. It will be retried next cycle.")
+                    finally:
+                        # Status changes are applied in bulk; the outbox already protects against re-posting if this is lost.
+                        update_articles_status(conn, posted_urls, STATUS_POSTED)
+                        update_articles_status(conn, expired_urls, STATUS_EXPIRED)
+                        if expired_urls:
+                            logging.info(f"Expired {len(expired_urls)} translated articles older than the posting window.")
                 else:
                     logging.info("\nℹ️ Posting to Tumblr and Telegram is disabled in config. Skipping posting stage.")
     except psycopg2.Error as e:
         logging.critical(f"Database connection error during cycle: {e}")
         # The script will pause and retry in the main loop.
         raise
+    log_domain_health()
+    enforce_retention()
     logging.info("--- Cycle complete ---")
 
+def reextract_from_archive():
+    """Re-parses archived HTML for every unposted article and queues it for re-translation. No network access."""
+    logging.info("--- Re-extracting unposted articles from the HTML archive ---")
+    reextracted = 0
+    with get_db_connection() as conn:
+        articles = get_articles_by_status(conn, STATUS_FETCHED) + get_articles_by_status(conn, STATUS_TRANSLATED)
+        futures = []
+        for article in articles:
+            html_bytes, encoding = fetch_article_html(article['url'], offline=True)
+            if not html_bytes:
+                logging.warning(f"    -> No archived HTML for {article['url']}. Skipping.")
+                continue
+            futures.append((article['url'], submit_article_parse(article['url'], html_bytes, encoding)))
+        for url, future in futures:
+            full_text = collect_article_text(url, future)
+            if full_text:
+                update_article_summary(conn, url, full_text)
+                reextracted += 1
+    logging.info(f"✅ Re-extracted {reextracted} of {len(articles)} unposted articles from the archive.")
+
+def log_startup_time():
+    """Reports import time (module level plus the lazy startup imports) against the budget,
+    and the total time until the bot is ready for its first cycle."""
+    import_ms = IMPORT_TIME_MS + sum(LAZY_IMPORT_MS.values())
+    breakdown = ', '.join(f"{name} {ms:.0f} ms" for name, ms in [('main.py', IMPORT_TIME_MS), *LAZY_IMPORT_MS.items()])
+    ready_ms = (time.perf_counter() - _IMPORT_STARTED_AT) * 1000
+    message = (f"Imports took {import_ms:.0f} ms ({breakdown}; budget: {STARTUP_IMPORT_BUDGET_MS} ms). "
+               f"Ready for the first cycle after {ready_ms:.0f} ms.")
+    if import_ms > STARTUP_IMPORT_BUDGET_MS:
+        logging.warning(message)
+    else:
+        logging.info(message)
+
 def main():
+    parser = argparse.ArgumentParser(description="DANA news bot: fetches, translates and posts news articles.")
+    parser.add_argument('--reextract', action='store_true', help="Re-parse unposted articles from the HTML archive and exit.")
+    parser.add_argument('--record-cycle', metavar='PATH', help="Run a single cycle, record its HTTP and database traffic to PATH "
+                                                                "for 'python replay.py PATH', and exit. Posts are really published.")
+    args = parser.parse_args()
+
     logger = logging.getLogger()
     logger.setLevel(logging.INFO)
     handler = RotatingFileHandler(LOG_FILE, maxBytes=5*1024*1024, backupCount=5, encoding='utf-8')
     handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
     logger.addHandler(handler)
-    coloredlogs.install(level='INFO', logger=logger)
+    timed_import('coloredlogs').install(level='INFO', logger=logger)
     logging.info("--- Bot starting up ---")
 
     if not DATABASE_URL:
@@ -503,6 +934,9 @@ def main():
         return
 
     init_db()
+    if args.reextract:
+        reextract_from_archive()
+        return
     if TARGET_COUNTRY not in COUNTRIES:
         logging.critical(f"Invalid TARGET_COUNTRY '{TARGET_COUNTRY}' in .env file. Exiting.")
         return
@@ -511,19 +945,24 @@ def main():
         return
     logging.info(f"✅ Configuration loaded: Country='{TARGET_COUNTRY}', Category='{TARGET_CATEGORY}', Selenium='{USE_SELENIUM_SCRAPING}'")
     try:
-        tumblr_client = pytumblr.TumblrRestClient(TUMBLR_CONSUMER_KEY, TUMBLR_CONSUMER_SECRET, TUMBLR_OAUTH_TOKEN, TUMBLR_OAUTH_SECRET)
-        tumblr_client.info()
-        logging.info("✅ Tumblr client initialized.")
-        telegram_bot = telegram.Bot(token=TELEGRAM_BOT_TOKEN)
+        # Clients are only created (and their libraries imported) for enabled platforms.
+        tumblr_client = create_tumblr_client() if POST_TO_TUMBLR else None
+        telegram_bot = create_telegram_bot() if POST_TO_TELEGRAM else None
         try: loop = asyncio.get_event_loop()
         except RuntimeError:
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
-        loop.run_until_complete(async_check_telegram(telegram_bot))
-        logging.info("✅ Telegram bot initialized.")
+        loop.run_until_complete(async_check_credentials(tumblr_client, telegram_bot))
+        if tumblr_client: logging.info("✅ Tumblr client initialized.")
+        if telegram_bot: logging.info("✅ Telegram bot initialized.")
     except Exception as e:
         logging.error(f"API authentication failed: {e}. Check your keys in the .env file. Exiting.")
         return
+    log_startup_time()
+    if args.record_cycle:
+        from replay import record_cycle
+        record_cycle(args.record_cycle, tumblr_client, telegram_bot, TARGET_COUNTRY, TARGET_CATEGORY)
+        return
     while True:
         try:
             run_cycle(tumblr_client, telegram_bot, TARGET_COUNTRY, TARGET_CATEGORY)
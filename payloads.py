@@ -0,0 +1,106 @@
+# payloads.py
+import html
+from html.parser import HTMLParser
+
+# Telegram counts caption length after entity parsing, i.e. visible characters only.
+TELEGRAM_CAPTION_LIMIT = 1024
+TELEGRAM_PREVIEW_CHARS = 450
+# Replaced with the Tumblr post URL (or the article URL) at posting time.
+SEE_MORE_PLACEHOLDER = '{see_more_url}'
+SEE_MORE_TEXT = 'درێژەی بابەت...'
+# Tumblr tags can't contain commas and are capped at 140 characters.
+TUMBLR_TAG_MAX_LENGTH = 140
+
+class _TelegramPreview(HTMLParser):
+    """Converts translated summary HTML into Telegram-safe HTML, cut at a visible-character budget.
+    Only tags Telegram understands are kept, block elements become line breaks, and any tag
+    still open at the cut is closed."""
+    INLINE_TAGS = {'b': 'b', 'strong': 'b', 'i': 'i', 'em': 'i', 'u': 'u', 's': 's', 'code': 'code'}
+    BLOCK_TAGS = {'p', 'div', 'li', 'br', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+
+    def __init__(self, limit):
+        super().__init__(convert_charrefs=True)
+        self.limit, self.visible, self.truncated = limit, 0, False
+        self.parts, self.open_tags = [], []
+
+    def _newline(self):
+        if self.visible and not self.parts[-1].endswith('\n') and self.visible < self.limit:
+            self.parts.append('\n')
+            self.visible += 1
+
+    def handle_starttag(self, tag, attrs):
+        if self.truncated: return
+        if tag in self.INLINE_TAGS:
+            self.parts.append(f"<{self.INLINE_TAGS[tag]}>")
+            self.open_tags.append(self.INLINE_TAGS[tag])
+        elif tag == 'br':
+            self._newline()
+
+    def handle_endtag(self, tag):
+        if self.truncated: return
+        mapped = self.INLINE_TAGS.get(tag)
+        if mapped and mapped in self.open_tags:
+            while self.open_tags:
+                closing = self.open_tags.pop()
+                self.parts.append(f"</{closing}>")
+                if closing == mapped: break
+        elif tag in self.BLOCK_TAGS:
+            self._newline()
+
+    def handle_data(self, data):
+        if self.truncated or not data.strip() and not self.visible: return
+        remaining = self.limit - self.visible
+        if len(data) <= remaining:
+            self.parts.append(html.escape(data, quote=False))
+            self.visible += len(data)
+            return
+        # Cut at a word boundary when there is one, and leave room for the ellipsis.
+        cut = data[:max(0, remaining - 3)]
+        if ' ' in cut:
+            cut = cut[:cut.rfind(' ')]
+        self.parts.append(html.escape(cut.rstrip(), quote=False) + '...')
+        self.visible += len(cut.rstrip()) + 3
+        self.truncated = True
+
+    def result(self):
+        closing = ''.join(f"</{tag}>" for tag in reversed(self.open_tags))
+        return (''.join(self.parts) + closing).strip()
+
+def render_telegram_caption(title_ku, summary_html):
+    """Builds the Telegram photo caption, with SEE_MORE_PLACEHOLDER standing in for the link target."""
+    title = html.escape(title_ku.strip(), quote=False)
+    fixed_visible = len(title_ku.strip()) + len('\n\n') * 2 + len(SEE_MORE_TEXT)
+    parser = _TelegramPreview(min(TELEGRAM_PREVIEW_CHARS, TELEGRAM_CAPTION_LIMIT - fixed_visible))
+    parser.feed(summary_html)
+    parser.close()
+    return f"<b>{title}</b>\n\n{parser.result()}\n\n<i><a href='{SEE_MORE_PLACEHOLDER}'>{SEE_MORE_TEXT}</a></i>"
+
+def render_tumblr_tags(category_ku, source, generated_tags):
+    tags = []
+    for tag in [category_ku, source, *generated_tags]:
+        tag = str(tag or '').replace(',', ' ').lstrip('#').strip()[:TUMBLR_TAG_MAX_LENGTH]
+        if tag and tag not in tags:
+            tags.append(tag)
+    return tags
+
+def render_tumblr_caption(article, title_ku, summary_html):
+    source_html = f"<p class='text-center'><a class='link-secondary link-offset-3' href='{html.escape(article['url'])}' target='_blank'>{article['source']}</a></p>"
+    summary_with_more_tag = summary_html.replace('</p>', '</p>[[MORE]]', 1)
+    return f"<h5 class='card-title lh-base pt-1'>{title_ku}</h5>{summary_with_more_tag}{source_html}"
+
+def render_payloads(article):
+    """Validates a translated article and renders its platform payloads.
+    Returns (url, tumblr_caption, tumblr_tags, telegram_caption). Raises ValueError if the translation is unusable."""
+    title_ku, summary_html = (article.get('title_ku') or '').strip(), (article.get('summary_ku') or '').strip()
+    if not title_ku or not summary_html:
+        raise ValueError("translation is missing its title or summary")
+    generated_tags = article.get('generated_tags') or []
+    if not isinstance(generated_tags, list):
+        raise ValueError("generated tags are not a list")
+    telegram_caption = render_telegram_caption(title_ku, summary_html)
+    return (
+        article['url'],
+        render_tumblr_caption(article, title_ku, summary_html),
+        render_tumblr_tags(article.get('category_ku'), article.get('source'), generated_tags),
+        telegram_caption
+    )
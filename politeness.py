@@ -0,0 +1,180 @@
+# politeness.py
+import time
+import logging
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+import requests
+
+from config import (
+    CONTACT_EMAIL, BLOG_URL, DOMAIN_MIN_DELAY_SECONDS, DOMAIN_BURST,
+    DOMAIN_MAX_WAIT_SECONDS, ROBOTS_CACHE_HOURS, DOMAIN_BACKOFF_BASE_SECONDS,
+    DOMAIN_BACKOFF_MAX_SECONDS, DOMAIN_FAILURE_THRESHOLD, DOMAIN_SKIP_HOURS
+)
+
+USER_AGENT = f'DANA News Bot/1.0 (Contact: {CONTACT_EMAIL}; Blog: {BLOG_URL})'
+# The product token robots.txt rules are matched against.
+ROBOTS_AGENT = 'DANA News Bot'
+
+# In-memory state, kept for the lifetime of the bot process.
+_robots_cache = {}   # domain -> (RobotFileParser or None, fetched_at)
+_buckets = {}        # domain -> {'tokens': float, 'updated': float}
+_domain_stats = {}   # domain -> health counters, see _get_stats()
+
+def get_domain(url):
+    """Returns the lower-cased host of a URL, without a leading 'www.'."""
+    host = (urlparse(url).hostname or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+def _get_stats(domain):
+    return _domain_stats.setdefault(domain, {
+        'requests': 0, 'successes': 0, 'failures': 0, 'consecutive_failures': 0,
+        'last_status': None, 'backoff_level': 0, 'blocked_until': 0.0
+    })
+
+## robots.txt Cache
+def _get_robots(url):
+    """Returns the cached robots.txt parser for the URL's site, fetching it when stale."""
+    parsed = urlparse(url)
+    domain = get_domain(url)
+    cached = _robots_cache.get(domain)
+    if cached and time.time() - cached[1] < ROBOTS_CACHE_HOURS * 3600:
+        return cached[0]
+
+    robots_url = f"{parsed.scheme}://{parsed.netloc}/robots.txt"
+    rules = RobotFileParser(robots_url)
+    try:
+        response = requests.get(robots_url, headers={'User-Agent': USER_AGENT}, timeout=10)
+        if response.status_code in (401, 403):
+            rules.disallow_all = True
+        elif response.status_code >= 400:
+            rules.allow_all = True
+        else:
+            rules.parse(response.text.splitlines())
+    except requests.exceptions.RequestException as e:
+        # An unreachable robots.txt shouldn't block the site; retry on the next cache refresh.
+        logging.warning(f"Could not fetch robots.txt for {domain}: {e}")
+        rules = None
+    _robots_cache[domain] = (rules, time.time())
+    return rules
+
+def is_allowed_by_robots(url):
+    rules = _get_robots(url)
+    return rules is None or rules.can_fetch(ROBOTS_AGENT, url)
+
+def get_domain_delay(url):
+    """Seconds between requests to the URL's domain: our minimum or robots.txt, whichever is stricter."""
+    delay = DOMAIN_MIN_DELAY_SECONDS
+    rules = _get_robots(url)
+    if rules is not None:
+        crawl_delay = rules.crawl_delay(ROBOTS_AGENT)
+        if crawl_delay:
+            delay = max(delay, float(crawl_delay))
+        request_rate = rules.request_rate(ROBOTS_AGENT)
+        if request_rate and request_rate.requests:
+            delay = max(delay, request_rate.seconds / request_rate.requests)
+    return delay
+
+## Token Buckets
+def _reserve_slot(url):
+    """Takes a token from the domain's bucket and returns how long to wait before sending."""
+    domain = get_domain(url)
+    delay = get_domain_delay(url)
+    now = time.monotonic()
+    bucket = _buckets.setdefault(domain, {'tokens': float(DOMAIN_BURST), 'updated': now})
+    bucket['tokens'] = min(float(DOMAIN_BURST), bucket['tokens'] + (now - bucket['updated']) / delay)
+    bucket['updated'] = now
+    if bucket['tokens'] >= 1:
+        bucket['tokens'] -= 1
+        return 0.0
+    return (1 - bucket['tokens']) * delay
+
+## Health & Backoff
+def should_skip_domain(url):
+    """True if the domain is backing off or has been failing consistently."""
+    stats = _get_stats(get_domain(url))
+    return time.time() < stats['blocked_until']
+
+def _parse_retry_after(response):
+    value = response.headers.get('Retry-After', '') if response is not None else ''
+    return int(value) if value.strip().isdigit() else 0
+
+def is_domain_failure(status_code):
+    """Only blocks, rate limits, server errors and network errors say something about the domain.
+    A 404 or 410 is just a dead article link."""
+    return status_code is None or status_code in (403, 429) or status_code >= 500
+
+def record_result(url, status_code, response=None):
+    """Updates domain health. status_code is None for network errors."""
+    domain = get_domain(url)
+    stats = _get_stats(domain)
+    stats['requests'] += 1
+    stats['last_status'] = status_code
+
+    if status_code is not None and status_code < 400:
+        stats['successes'] += 1
+        stats['consecutive_failures'] = 0
+        stats['backoff_level'] = 0
+        return
+    if not is_domain_failure(status_code):
+        return
+
+    stats['failures'] += 1
+    stats['consecutive_failures'] += 1
+    if status_code in (403, 429):
+        backoff = min(DOMAIN_BACKOFF_BASE_SECONDS * 2 ** stats['backoff_level'], DOMAIN_BACKOFF_MAX_SECONDS)
+        backoff = max(backoff, _parse_retry_after(response))
+        stats['backoff_level'] += 1
+        stats['blocked_until'] = max(stats['blocked_until'], time.time() + backoff)
+        logging.warning(f"    -> {domain} answered {status_code}. Backing off for {backoff / 60:.0f} minutes.")
+    if stats['consecutive_failures'] >= DOMAIN_FAILURE_THRESHOLD:
+        stats['blocked_until'] = max(stats['blocked_until'], time.time() + DOMAIN_SKIP_HOURS * 3600)
+        logging.warning(f"    -> {domain} failed {stats['consecutive_failures']} times in a row. Skipping it for {DOMAIN_SKIP_HOURS} hours.")
+
+## Scheduler Entry Points
+def wait_for_slot(url):
+    """Blocks until the domain may be contacted. Returns False if the request should be skipped."""
+    domain = get_domain(url)
+    if should_skip_domain(url):
+        logging.info(f"    -> Skipping {domain}: domain is backing off after recent failures.")
+        return False
+    if not is_allowed_by_robots(url):
+        logging.info(f"    -> Skipping {url}: disallowed by robots.txt.")
+        return False
+    wait = _reserve_slot(url)
+    if wait > DOMAIN_MAX_WAIT_SECONDS:
+        # Long crawl delays would stall the whole cycle; the article is picked up again next cycle.
+        logging.info(f"    -> Deferring {url}: next slot for {domain} is {wait:.0f}s away.")
+        return False
+    if wait > 0:
+        time.sleep(wait)
+        _buckets[domain]['updated'] = time.monotonic()
+        _buckets[domain]['tokens'] = 0.0
+    return True
+
+def polite_get(url, **kwargs):
+    """GETs a URL through the per-domain scheduler. Returns the response, or None if skipped or failed."""
+    if not wait_for_slot(url):
+        return None
+    headers = {'User-Agent': USER_AGENT, **kwargs.pop('headers', {})}
+    try:
+        response = requests.get(url, headers=headers, **kwargs)
+    except requests.exceptions.RequestException as e:
+        record_result(url, None)
+        logging.error(f"Failed to download {url}. Error: {e}")
+        return None
+    record_result(url, response.status_code, response)
+    if response.status_code >= 400:
+        logging.error(f"Failed to download {url}. HTTP {response.status_code}.")
+        response.close()  # Streamed responses hold their pooled connection until closed.
+        return None
+    return response
+
+def log_domain_health():
+    """Logs domains that are currently failing or backing off."""
+    now = time.time()
+    for domain, stats in sorted(_domain_stats.items()):
+        if stats['blocked_until'] > now or stats['consecutive_failures']:
+            minutes_left = max(0, stats['blocked_until'] - now) / 60
+            logging.info(f"    - {domain}: {stats['successes']}/{stats['requests']} ok, "
+                         f"{stats['consecutive_failures']} consecutive failures, "
+                         f"last status {stats['last_status']}, blocked for {minutes_left:.0f} more minutes")
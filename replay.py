@@ -0,0 +1,461 @@
+# replay.py
+"""
+Record/replay profiling for a single bot cycle.
+
+Recording (live APIs, real database; posts are really published):
+    python main.py --record-cycle data/fixtures/cycle.json.gz
+
+Replaying offline under cProfile and tracemalloc:
+    python replay.py data/fixtures/cycle.json.gz [--report-dir data/profiles] [--parse-in-pool]
+
+A bundle holds every outbound HTTP exchange (NewsAPI, article pages, robots.txt, images, Gemini,
+Tumblr, Telegram) and every database statement with the rows it returned, in call order.
+API keys and the Telegram bot token are redacted from recorded URLs. During a replay the clock
+starts at the moment of recording, so article ages and cooldowns behave as they did then.
+"""
+import re
+import os
+import io
+import gzip
+import json
+import time
+import base64
+import asyncio
+import logging
+import pstats
+import argparse
+import cProfile
+import tracemalloc
+from collections import defaultdict, deque
+from concurrent.futures import Future
+from datetime import datetime, date, timezone
+from decimal import Decimal
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import requests
+from psycopg2.extras import DictCursor
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+import main
+import archive
+import scheduler
+from config import DATA_DIR
+
+BUNDLE_VERSION = 1
+SECRET_QUERY_PARAMS = ('apiKey', 'api_key', 'key')
+# Streamed responses of these types (image validation) are recorded without their body.
+UNREAD_CONTENT_TYPES = ('image/', 'video/', 'audio/')
+DEFAULT_REPORT_DIR = os.path.join(DATA_DIR, 'profiles')
+
+## Serialization Helpers
+def _redact_url(url):
+    parts = urlsplit(url)
+    query = [(k, 'REDACTED' if k in SECRET_QUERY_PARAMS else v) for k, v in parse_qsl(parts.query, keep_blank_values=True)]
+    path = re.sub(r'/bot[^/]+/', '/bot<token>/', parts.path)
+    return urlunsplit((parts.scheme, parts.netloc, path, urlencode(query), parts.fragment))
+
+def _encode_value(value):
+    if isinstance(value, (datetime, date)):
+        return {'$datetime': value.isoformat()}
+    if isinstance(value, (bytes, memoryview)):
+        return {'$bytes': base64.b64encode(bytes(value)).decode('ascii')}
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if '$datetime' in value:
+            return datetime.fromisoformat(value['$datetime'])
+        if '$bytes' in value:
+            return base64.b64decode(value['$bytes'])
+    return value
+
+def _sql_key(sql):
+    """Normalizes a statement for matching. execute_values inlines its rows after VALUES, so that part is dropped."""
+    if isinstance(sql, bytes):
+        sql = sql.decode('utf-8', errors='replace')
+    return ' '.join(re.split(r'\bVALUES\b', str(sql), maxsplit=1)[0].split())
+
+class _Patches:
+    """Swaps attributes on modules/classes and puts them back on restore()."""
+    def __init__(self):
+        self._originals = []
+
+    def set(self, owner, name, value):
+        self._originals.append((owner, name, getattr(owner, name)))
+        setattr(owner, name, value)
+
+    def restore(self):
+        while self._originals:
+            owner, name, value = self._originals.pop()
+            setattr(owner, name, value)
+
+## Database Recording & Replay
+class RecordingCursor:
+    def __init__(self, cursor, log):
+        self._cursor, self._log = cursor, log
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return self._cursor.__exit__(*exc)
+
+    def execute(self, sql, params=None):
+        self._cursor.execute(sql, params)
+        columns = [column.name for column in self._cursor.description] if self._cursor.description else None
+        self._log.append({'sql': _sql_key(sql), 'columns': columns, 'rowcount': self._cursor.rowcount, 'rows': []})
+
+    def _record(self, rows):
+        self._log[-1]['rows'].extend([[_encode_value(v) for v in row] for row in rows])
+        return rows
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._record([row])
+        return row
+
+    def fetchall(self):
+        return self._record(self._cursor.fetchall())
+
+class RecordingConnection:
+    def __init__(self, conn, log):
+        self._conn, self._log = conn, log
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._conn.__exit__(*exc)
+
+    def cursor(self, *args, **kwargs):
+        return RecordingCursor(self._conn.cursor(*args, **kwargs), self._log)
+
+class ReplayCursor:
+    def __init__(self, connection, as_dicts):
+        self.connection, self._as_dicts = connection, as_dicts
+        self._rows, self.rowcount = deque(), -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def mogrify(self, template, args):
+        # Only used by execute_values; the inlined values are dropped by _sql_key anyway.
+        return repr(tuple(args)).encode('utf-8')
+
+    def execute(self, sql, params=None):
+        entry = self.connection.next_result(_sql_key(sql))
+        self.rowcount = entry['rowcount'] if entry else 0
+        rows = [[_decode_value(v) for v in row] for row in entry['rows']] if entry else []
+        if self._as_dicts and entry and entry['columns']:
+            rows = [dict(zip(entry['columns'], row)) for row in rows]
+        else:
+            rows = [tuple(row) for row in rows]
+        self._rows = deque(rows)
+
+    def fetchone(self):
+        return self._rows.popleft() if self._rows else None
+
+    def fetchall(self):
+        rows, self._rows = list(self._rows), deque()
+        return rows
+
+class ReplayConnection:
+    """Answers statements from the bundle, in recorded order per statement text."""
+    encoding = 'UTF8'
+
+    def __init__(self, entries, stats):
+        self._results = defaultdict(deque)
+        for entry in entries:
+            self._results[entry['sql']].append(entry)
+        self._stats = stats
+        self.autocommit = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def cursor(self, cursor_factory=None, **kwargs):
+        return ReplayCursor(self, cursor_factory is DictCursor)
+
+    def next_result(self, key):
+        if self._results[key]:
+            return self._results[key].popleft()
+        self._stats['db_misses'][key] += 1
+        return None
+
+    def commit(self): pass
+    def rollback(self): pass
+    def close(self): pass
+
+## HTTP Recording & Replay
+def _build_response(request, entry):
+    content = base64.b64decode(entry['content'])
+    response = requests.Response()
+    response.status_code = entry['status']
+    response.reason = entry.get('reason', '')
+    response.headers = CaseInsensitiveDict(entry.get('headers', {}))
+    response.url = request.url
+    response.request = request
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response.raw = io.BytesIO(content)
+    response._content, response._content_consumed = content, True
+    return response
+
+def _install_http_recorder(patches, log):
+    original_send = HTTPAdapter.send
+
+    def recording_send(adapter, request, *args, **kwargs):
+        entry = {'method': request.method, 'url': _redact_url(request.url)}
+        started = time.perf_counter()
+        stream = kwargs.get('stream', args[0] if args else False)
+        try:
+            response = original_send(adapter, request, *args, **kwargs)
+            if stream and response.headers.get('Content-Type', '').lower().startswith(UNREAD_CONTENT_TYPES):
+                # The caller only looks at status and headers; downloading the file would skew the network time.
+                content = b''
+            else:
+                content = response.content  # Reads streamed bodies fully so they can be stored.
+        except requests.exceptions.RequestException as e:
+            log.append({**entry, 'error': type(e).__name__, 'message': str(e), 'elapsed_ms': (time.perf_counter() - started) * 1000})
+            raise
+        log.append({**entry, 'status': response.status_code, 'reason': response.reason, 'headers': dict(response.headers),
+                    'content': base64.b64encode(content).decode('ascii'), 'elapsed_ms': (time.perf_counter() - started) * 1000})
+        return response
+
+    patches.set(HTTPAdapter, 'send', recording_send)
+
+    try:
+        from telegram.request import HTTPXRequest
+    except ImportError:
+        return
+    original_do_request = HTTPXRequest.do_request
+
+    async def recording_do_request(request, url, method, *args, **kwargs):
+        started = time.perf_counter()
+        status, payload = await original_do_request(request, url, method, *args, **kwargs)
+        log.append({'method': method, 'url': _redact_url(url), 'status': status,
+                    'content': base64.b64encode(payload).decode('ascii'), 'elapsed_ms': (time.perf_counter() - started) * 1000})
+        return status, payload
+
+    patches.set(HTTPXRequest, 'do_request', recording_do_request)
+
+def _install_http_replayer(patches, entries, stats):
+    fixtures = defaultdict(deque)
+    for entry in entries:
+        fixtures[(entry['method'], entry['url'])].append(entry)
+
+    def next_fixture(method, url):
+        key = (method, _redact_url(url))
+        if fixtures[key]:
+            return fixtures[key].popleft()
+        stats['http_misses'][f"{method} {key[1]}"] += 1
+        return None
+
+    def replay_send(adapter, request, *args, **kwargs):
+        entry = next_fixture(request.method, request.url)
+        if entry is None:
+            raise requests.exceptions.ConnectionError(f"Replay: no recorded response for {request.method} {_redact_url(request.url)}")
+        if 'error' in entry:
+            raise getattr(requests.exceptions, entry['error'], requests.exceptions.ConnectionError)(entry['message'])
+        return _build_response(request, entry)
+
+    patches.set(HTTPAdapter, 'send', replay_send)
+
+    try:
+        from telegram.request import HTTPXRequest
+        from telegram.error import NetworkError
+    except ImportError:
+        return
+
+    async def replay_do_request(request, url, method, *args, **kwargs):
+        entry = next_fixture(method, url)
+        if entry is None:
+            raise NetworkError(f"Replay: no recorded response for {method} {_redact_url(url)}")
+        return entry['status'], base64.b64decode(entry['content'])
+
+    patches.set(HTTPXRequest, 'do_request', replay_do_request)
+
+## Recording
+def record_cycle(bundle_path, tumblr_client, telegram_bot, country, category):
+    """Runs one real cycle while capturing its HTTP traffic and database results into a bundle."""
+    bundle = {
+        'version': BUNDLE_VERSION,
+        'recorded_at': datetime.now(timezone.utc).isoformat(),
+        'settings': {'country': country, 'category': category,
+                     'post_to_tumblr': main.POST_TO_TUMBLR, 'post_to_telegram': main.POST_TO_TELEGRAM,
+                     'use_selenium': main.USE_SELENIUM_SCRAPING},
+        'http': [], 'db': []
+    }
+    patches = _Patches()
+    original_get_db_connection = main.get_db_connection
+    patches.set(main, 'get_db_connection', lambda: RecordingConnection(original_get_db_connection(), bundle['db']))
+    _install_http_recorder(patches, bundle['http'])
+    logging.info(f"⏺️ Recording one cycle into {bundle_path}...")
+    try:
+        main.run_cycle(tumblr_client, telegram_bot, country, category)
+    finally:
+        patches.restore()
+        os.makedirs(os.path.dirname(bundle_path) or '.', exist_ok=True)
+        with gzip.open(bundle_path, 'wt', encoding='utf-8') as f:
+            json.dump(bundle, f, ensure_ascii=False)
+        logging.info(f"✅ Recorded {len(bundle['http'])} HTTP exchanges and {len(bundle['db'])} database statements.")
+
+## Replay & Profiling
+class _ReplayClock:
+    """Virtual time for a replay. It starts at the bundle's recorded_at and sleep() jumps it forward
+    instead of waiting, so article ages, fetch cooldowns and posting slots match the recorded cycle."""
+    def __init__(self, recorded_at):
+        self._real_time, self._real_monotonic = time.time, time.monotonic
+        self._offset = datetime.fromisoformat(recorded_at).timestamp() - self._real_time()
+        self._slept = 0.0
+
+    def sleep(self, seconds):
+        self._slept += max(0.0, seconds)
+
+    def time(self):
+        return self._real_time() + self._offset + self._slept
+
+    def monotonic(self):
+        return self._real_monotonic() + self._slept
+
+    def datetime_class(self):
+        """A datetime subclass whose now() reads this clock, for modules that import `datetime` directly."""
+        clock = self
+
+        class ReplayDatetime(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return datetime.fromtimestamp(clock.time(), tz)
+
+        return ReplayDatetime
+
+class _InlineExecutor:
+    """Runs parse tasks in this process so they show up in the profile."""
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+def _create_replay_clients(settings):
+    tumblr_client, telegram_bot = None, None
+    if settings['post_to_tumblr']:
+        import pytumblr
+        # Requests are answered from the bundle, so the credentials are never checked.
+        tumblr_client = pytumblr.TumblrRestClient('replay', 'replay', 'replay', 'replay')
+    if settings['post_to_telegram']:
+        import telegram
+        telegram_bot = telegram.Bot(token=main.TELEGRAM_BOT_TOKEN or 'replay:token')
+    return tumblr_client, telegram_bot
+
+def _write_reports(report_dir, profiler, snapshot, stats, elapsed, recorded_network_ms):
+    os.makedirs(report_dir, exist_ok=True)
+    prof_path = os.path.join(report_dir, 'cycle.prof')
+    profiler.dump_stats(prof_path)
+
+    with open(os.path.join(report_dir, 'cycle_profile.txt'), 'w', encoding='utf-8') as f:
+        f.write(f"Replayed cycle wall time: {elapsed:.2f}s (recorded network time: {recorded_network_ms / 1000:.2f}s, sleeps skipped)\n\n")
+        if stats['http_misses'] or stats['db_misses']:
+            f.write("Replay misses (behaviour diverged from the recording):\n")
+            for key, count in list(stats['http_misses'].items()) + list(stats['db_misses'].items()):
+                f.write(f"  {count}x {key}\n")
+            f.write("\n")
+        profile_stats = pstats.Stats(profiler, stream=f).strip_dirs()
+        profile_stats.sort_stats('cumulative').print_stats(40)
+        profile_stats.sort_stats('tottime').print_stats(25)
+
+    with open(os.path.join(report_dir, 'allocations.txt'), 'w', encoding='utf-8') as f:
+        snapshot = snapshot.filter_traces((tracemalloc.Filter(False, tracemalloc.__file__),))
+        f.write("Top allocation sites (by line):\n")
+        for statistic in snapshot.statistics('lineno')[:30]:
+            f.write(f"  {statistic}\n")
+        f.write("\nLargest allocation tracebacks:\n")
+        for statistic in snapshot.statistics('traceback')[:5]:
+            f.write(f"\n  {statistic.count} blocks, {statistic.size / 1024:.1f} KiB\n")
+            for line in statistic.traceback.format():
+                f.write(f"    {line}\n")
+    return prof_path
+
+def replay_cycle(bundle_path, report_dir=DEFAULT_REPORT_DIR, parse_in_pool=False):
+    """Re-runs a recorded cycle offline under cProfile and tracemalloc and writes reports to report_dir."""
+    with gzip.open(bundle_path, 'rt', encoding='utf-8') as f:
+        bundle = json.load(f)
+    if bundle.get('version') != BUNDLE_VERSION:
+        raise ValueError(f"Unsupported bundle version {bundle.get('version')} in {bundle_path}.")
+    settings = bundle['settings']
+    stats = {'http_misses': defaultdict(int), 'db_misses': defaultdict(int)}
+
+    patches = _Patches()
+    replay_connection = ReplayConnection(bundle['db'], stats)
+    patches.set(main, 'get_db_connection', lambda: replay_connection)
+    patches.set(main, 'POST_TO_TUMBLR', settings['post_to_tumblr'])
+    patches.set(main, 'POST_TO_TELEGRAM', settings['post_to_telegram'])
+    patches.set(main, 'USE_SELENIUM_SCRAPING', False)  # Selenium traffic bypasses requests and can't be replayed.
+    patches.set(main, 'EMAIL_NOTIFICATIONS_ENABLED', False)
+    patches.set(main, 'TELEGRAM_BOT_TOKEN', main.TELEGRAM_BOT_TOKEN or 'replay:token')
+    patches.set(main, 'TELEGRAM_CHAT_ID', main.TELEGRAM_CHAT_ID or 'replay')
+    patches.set(archive, 'ARCHIVE_ENABLED', False)
+    # Posting-rate and politeness pauses aren't CPU work; they only advance the virtual clock.
+    clock = _ReplayClock(bundle['recorded_at'])
+    patches.set(time, 'sleep', clock.sleep)
+    patches.set(time, 'time', clock.time)
+    patches.set(time, 'monotonic', clock.monotonic)
+    for module in (main, scheduler):
+        patches.set(module, 'datetime', clock.datetime_class())
+    if not parse_in_pool:
+        patches.set(main, 'get_parse_pool', _InlineExecutor)
+    _install_http_replayer(patches, bundle['http'], stats)
+
+    try:
+        tumblr_client, telegram_bot = _create_replay_clients(settings)
+        asyncio.set_event_loop(asyncio.new_event_loop())
+        profiler = cProfile.Profile()
+        tracemalloc.start(25)
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            main.run_cycle(tumblr_client, telegram_bot, settings['country'], settings['category'])
+        finally:
+            profiler.disable()
+            elapsed = time.perf_counter() - started
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+    finally:
+        patches.restore()
+
+    recorded_network_ms = sum(entry.get('elapsed_ms', 0) for entry in bundle['http'])
+    prof_path = _write_reports(report_dir, profiler, snapshot, stats, elapsed, recorded_network_ms)
+    logging.info(f"✅ Replay finished in {elapsed:.2f}s. Profile: {prof_path} (open with snakeviz or flameprof). Reports in {report_dir}.")
+    if stats['http_misses'] or stats['db_misses']:
+        logging.warning(f"Replay diverged from the recording: {sum(stats['http_misses'].values())} HTTP and "
+                        f"{sum(stats['db_misses'].values())} database requests had no recorded answer. See cycle_profile.txt.")
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Replay a recorded bot cycle offline and profile it.")
+    parser.add_argument('bundle', help="Fixture bundle written by 'python main.py --record-cycle PATH'.")
+    parser.add_argument('--report-dir', default=DEFAULT_REPORT_DIR, help=f"Where to write profiles and reports (default: {DEFAULT_REPORT_DIR}).")
+    parser.add_argument('--parse-in-pool', action='store_true', help="Keep HTML parsing in the worker pool (it then won't appear in the profile).")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    replay_cycle(args.bundle, args.report_dir, args.parse_in_pool)
+
+if __name__ == "__main__":
+    main_cli()
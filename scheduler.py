@@ -0,0 +1,108 @@
+# scheduler.py
+import re
+import time
+import heapq
+import random
+import logging
+import itertools
+from datetime import datetime, timezone
+
+from config import (
+    CATEGORY_WEIGHTS, SOURCE_PRIORITY, FRESHNESS_HALF_LIFE_HOURS, DUPLICATE_PENALTY,
+    ARTICLE_MAX_AGE_HOURS, TUMBLR_POSTS_PER_HOUR, TELEGRAM_POSTS_PER_HOUR
+)
+
+POSTS_PER_HOUR = {'tumblr': TUMBLR_POSTS_PER_HOUR, 'telegram': TELEGRAM_POSTS_PER_HOUR}
+SLOT_JITTER = 0.1
+# Slots booked together drift apart by up to twice the jitter (plus the time one post takes), so a
+# platform due within this share of its interval after the earliest one is waited for as well.
+SLOT_GRACE = 2 * SLOT_JITTER + 0.05
+
+# Earliest time.monotonic() at which each platform may post again. Kept across cycles.
+_next_slot = {}
+_sequence = itertools.count()  # Tie-breaker so the heap never compares article dicts.
+
+## Scoring
+def get_age_hours(article, now=None):
+    """Hours since the article was published, or None if publishedAt can't be parsed."""
+    now = now or datetime.now(timezone.utc)
+    try:
+        published = datetime.fromisoformat(article.get('publishedAt', '').replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        return None
+    if published.tzinfo is None:
+        published = published.replace(tzinfo=timezone.utc)
+    return max(0.0, (now - published).total_seconds() / 3600)
+
+def is_expired(article, now=None):
+    age = get_age_hours(article, now)
+    return age is not None and age > ARTICLE_MAX_AGE_HOURS
+
+def _title_tokens(title):
+    return {word for word in re.findall(r'\w+', (title or '').lower()) if len(word) > 2}
+
+def title_similarity(tokens, recent_token_sets):
+    """Highest Jaccard similarity between a title and any recently posted title."""
+    best = 0.0
+    for other in recent_token_sets:
+        if tokens and other:
+            best = max(best, len(tokens & other) / len(tokens | other))
+    return best
+
+def score_article(article, recent_token_sets, now=None):
+    age = get_age_hours(article, now)
+    freshness = 0.5 if age is None else 0.5 ** (age / FRESHNESS_HALF_LIFE_HOURS)
+    weight = CATEGORY_WEIGHTS.get(article.get('category'), 1.0) * SOURCE_PRIORITY.get(article.get('source'), 1.0)
+    duplication = title_similarity(_title_tokens(article.get('title')), recent_token_sets)
+    return weight * freshness * (1 - DUPLICATE_PENALTY * duplication)
+
+## Ready Queue
+def build_ready_queue(articles, recent_titles):
+    """Builds a max-heap (by score) of articles. recent_titles are titles already posted recently."""
+    recent_token_sets = [_title_tokens(title) for title in recent_titles]
+    queue = [(-score_article(article, recent_token_sets), next(_sequence), article) for article in articles]
+    heapq.heapify(queue)
+    return queue
+
+def pop_best_article(queue, recent_titles):
+    """Pops the highest scoring article. Scores are refreshed lazily: the top entry is rescored
+    against the current time and recent posts, and pushed back if it no longer beats the runner-up."""
+    recent_token_sets = [_title_tokens(title) for title in recent_titles]
+    # One clock reading per call: rescoring tied articles against a moving clock could swap them forever.
+    now = datetime.now(timezone.utc)
+    while queue:
+        _, _, article = heapq.heappop(queue)
+        score = score_article(article, recent_token_sets, now)
+        if not queue or score >= -queue[0][0]:
+            return article, score
+        heapq.heappush(queue, (-score, next(_sequence), article))
+    return None, 0.0
+
+def requeue_article(queue, article, score):
+    """Puts an article back, e.g. while it waits for a slower platform's slot."""
+    heapq.heappush(queue, (-score, next(_sequence), article))
+
+## Posting Rate
+def _interval(platform):
+    return 3600 / (POSTS_PER_HOUR.get(platform) or 1)
+
+def wait_for_posting_slot(platforms):
+    """Sleeps until the earliest platform in `platforms` may post, and returns the ones that may post now.
+    Platforms due shortly after it (within SLOT_GRACE) are waited for too, so at equal rates an article
+    still goes out everywhere together, while a much slower platform never holds back a faster one."""
+    now = time.monotonic()
+    waits = {platform: _next_slot.get(platform, 0.0) - now for platform in platforms}
+    earliest = min(waits.values(), default=0.0)
+    due = [platform for platform in platforms if waits[platform] - earliest <= SLOT_GRACE * _interval(platform)]
+    wait = max((waits[platform] for platform in due), default=0.0)
+    if wait > 0:
+        logging.info(f"    - Pausing for {wait:.1f} seconds to keep to the posting rate...")
+        time.sleep(wait)
+    return due
+
+def book_posting_slot(platforms):
+    """Books the next slot for each platform that was just attempted, with +/-SLOT_JITTER jitter.
+    Failed attempts are booked too, so a failing platform is still paced."""
+    now = time.monotonic()
+    for platform in platforms:
+        _next_slot[platform] = now + _interval(platform) * random.uniform(1 - SLOT_JITTER, 1 + SLOT_JITTER)